@@ -0,0 +1,43 @@
+import os
+import sys
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+
+def create_click_rollup_table():
+    execute("""
+        CREATE TABLE IF NOT EXISTS url_shortener_click_rollup (
+            id               VARCHAR(36)  NOT NULL PRIMARY KEY,
+            url_shortener_id VARCHAR(36)  NOT NULL,
+            date             DATE         NOT NULL,
+            dimension        VARCHAR(50)  NOT NULL,
+            value            VARCHAR(255) NOT NULL DEFAULT '',
+            count            INT          NOT NULL DEFAULT 0,
+            CONSTRAINT fk_url_shortener_click_rollup_url_shortener
+                FOREIGN KEY (url_shortener_id) REFERENCES url_shortener (id) ON DELETE CASCADE,
+            UNIQUE KEY url_shortener_click_rollup_unique (url_shortener_id, date, dimension, value)
+        );
+    """)
+
+
+def add_tracker_created_at_index():
+    if not execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = 'url_shortener_tracker'
+          AND index_name = 'url_shortener_tracker_created_at';
+    """):
+        execute("CREATE INDEX url_shortener_tracker_created_at ON url_shortener_tracker (created_at);")
+
+
+if __name__ == '__main__':
+    create_click_rollup_table()
+    add_tracker_created_at_index()
+    execute("UPDATE system_setting SET value = '1.47', updated_at = now() WHERE `key` = 'db.version';")
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import django
+
+from connection import execute
+
+os.chdir('..')
+sys.path.append(os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mulearnbackend.settings')
+django.setup()
+
+
+def create_karma_approval_count_table():
+    execute("""
+        CREATE TABLE IF NOT EXISTS karma_approval_count (
+            id            VARCHAR(36) NOT NULL PRIMARY KEY,
+            approver_id   VARCHAR(36) NOT NULL,
+            approval_type VARCHAR(20) NOT NULL,
+            date          DATE        NOT NULL,
+            count         INT         NOT NULL DEFAULT 0,
+            CONSTRAINT fk_karma_approval_count_approver
+                FOREIGN KEY (approver_id) REFERENCES user (id) ON DELETE CASCADE,
+            UNIQUE KEY karma_approval_count_unique (approval_type, date, approver_id)
+        );
+    """)
+
+
+def add_karma_activity_log_updated_at_index():
+    if not execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = 'karma_activity_log'
+          AND index_name = 'karma_activity_log_updated_at';
+    """):
+        execute("CREATE INDEX karma_activity_log_updated_at ON karma_activity_log (updated_at);")
+
+
+if __name__ == '__main__':
+    create_karma_approval_count_table()
+    add_karma_activity_log_updated_at_index()
+    execute("UPDATE system_setting SET value = '1.48', updated_at = now() WHERE `key` = 'db.version';")
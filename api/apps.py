@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self) -> None:
+        # these modules connect their cache invalidation signals on import
+        from api.dashboard.lc import dash_lc_karma  # noqa: F401
+        from api.leaderboard import leaderboard_snapshot  # noqa: F401
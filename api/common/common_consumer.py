@@ -1,9 +1,13 @@
 import json
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import Count, Sum
 from django.db.models.functions import Coalesce
+from django_redis import get_redis_connection
 
 from channels.generic.websocket import WebsocketConsumer
 from channels.layers import get_channel_layer
@@ -13,12 +17,32 @@ from db.learning_circle import LearningCircle
 from db.learning_circle import UserCircleLink
 from db.organization import Organization
 from db.task import InterestGroup, KarmaActivityLog
-from db.user import User, UserRoleLink
+from db.user import Role, User, UserRoleLink
 
-from utils.types import IntegrationType, OrganizationType
+from utils.types import IntegrationType, OrganizationType, RoleType
 
 class LandingStats:
-    data = {}
+    """
+    Landing page counters kept in a Redis hash.
+
+    Model signals move the counters with HINCRBY instead of re-counting, a
+    periodic task reconciles them against the database, and broadcasts are
+    coalesced to at most one per LANDING_STATS_BROADCAST_SECONDS.
+    """
+
+    KEY = "landing_stats:counters"
+    BROADCAST_PENDING_KEY = "landing_stats:broadcast_pending"
+    BROADCAST_INTERVAL = settings.LANDING_STATS_BROADCAST_SECONDS
+    ORG_TYPES = [
+        OrganizationType.COLLEGE.value,
+        OrganizationType.COMPANY.value,
+        OrganizationType.COMMUNITY.value,
+    ]
+    ROLES = [RoleType.MENTOR.value, RoleType.ENABLER.value]
+
+    @staticmethod
+    def _redis():
+        return get_redis_connection("default")
 
     def members_count(self):
         members_count = User.objects.all().count()
@@ -26,8 +50,7 @@ class LandingStats:
 
     def org_type_counts(self):
         org_type_counts = Organization.objects.filter(
-                org_type__in=[OrganizationType.COLLEGE.value, OrganizationType.COMPANY.value,
-                                OrganizationType.COMMUNITY.value]
+                org_type__in=self.ORG_TYPES
             ).values('org_type').annotate(org_count=Coalesce(Count('org_type'), 0))
         org_type_counts = list(org_type_counts)
 
@@ -35,7 +58,7 @@ class LandingStats:
 
     def enablers_mentors_count(self):
         enablers_mentors_count = UserRoleLink.objects.filter(
-            role__title__in=["Mentor", "Enabler"]).values(
+            role__title__in=self.ROLES).values(
             'role__title').annotate(role_count=Coalesce(Count('role__title'), 0))
         enablers_mentors_count = list(enablers_mentors_count)
 
@@ -48,35 +71,109 @@ class LandingStats:
     def learning_circles_count(self):
         learning_circles_count = LearningCircle.objects.all().count()
         return learning_circles_count
-    
+
     def karma_pow_count(self):
         karma_pow_count = KarmaActivityLog.objects.aggregate(karma_count=Coalesce(Sum('karma'), 0), pow_count=Count('id'))
         return karma_pow_count
 
-    def get_data(self, sender):
-        if sender == None:
-            self.data = {
-                'members': self.members_count(),
-                'org_type_counts': self.org_type_counts(),
-                'enablers_mentors_count': self.enablers_mentors_count(),
-                'ig_count': self.interest_groups_count(),
-                'learning_circle_count': self.learning_circles_count(),
-                'karma_pow_count': self.karma_pow_count()
-            }
-        elif sender == User:
-            self.data['members'] = self.members_count()
-
-        elif sender == Organization:
-            self.data['org_type_counts'] = self.org_type_counts()
-
-        elif sender == UserRoleLink:
-            self.data['enablers_mentors_count'] = self.enablers_mentors_count()
-
-        elif sender == InterestGroup:
-            self.data['ig_count'] = self.interest_groups_count()
+    def reconcile(self):
+        """
+        Recounts everything from the database and overwrites the counters.
+        """
+        counters = {
+            'members': self.members_count(),
+            'ig_count': self.interest_groups_count(),
+            'learning_circle_count': self.learning_circles_count(),
+            **{f'org:{org_type}': 0 for org_type in self.ORG_TYPES},
+            **{f'role:{role}': 0 for role in self.ROLES},
+            **self.karma_pow_count(),
+        }
+        for org in self.org_type_counts():
+            counters[f"org:{org['org_type']}"] = org['org_count']
+        for role in self.enablers_mentors_count():
+            counters[f"role:{role['role__title']}"] = role['role_count']
+
+        pipeline = self._redis().pipeline()
+        pipeline.delete(self.KEY)
+        pipeline.hset(self.KEY, mapping=counters)
+        pipeline.execute()
+
+    def _deltas(self, sender, instance):
+        if sender == User:
+            return {'members': 1}
+        if sender == InterestGroup:
+            return {'ig_count': 1}
+        if sender == LearningCircle:
+            return {'learning_circle_count': 1}
+        if sender == KarmaActivityLog:
+            return {'karma_count': instance.karma or 0, 'pow_count': 1}
+        if sender == Organization and instance.org_type in self.ORG_TYPES:
+            return {f'org:{instance.org_type}': 1}
+        if sender == UserRoleLink:
+            role = Role.objects.filter(id=instance.role_id).values_list('title', flat=True).first()
+            if role in self.ROLES:
+                return {f'role:{role}': 1}
+        return {}
+
+    def update(self, sender, instance, sign):
+        redis = self._redis()
+        # an unbuilt hash is filled by the next reconcile, not from a partial count
+        if not redis.exists(self.KEY):
+            return False
+        if not (deltas := self._deltas(sender, instance)):
+            return False
+
+        pipeline = redis.pipeline()
+        for field, amount in deltas.items():
+            pipeline.hincrby(self.KEY, field, sign * amount)
+        pipeline.execute()
+        return True
+
+    def get_data(self):
+        counters = self._redis().hgetall(self.KEY)
+        if not counters:
+            self.reconcile()
+            counters = self._redis().hgetall(self.KEY)
+        counters = {
+            (field.decode() if isinstance(field, bytes) else field): int(value)
+            for field, value in counters.items()
+        }
+
+        return {
+            'members': counters.get('members', 0),
+            'org_type_counts': [
+                {'org_type': org_type, 'org_count': count}
+                for org_type in self.ORG_TYPES
+                if (count := counters.get(f'org:{org_type}', 0))
+            ],
+            'enablers_mentors_count': [
+                {'role__title': role, 'role_count': count}
+                for role in self.ROLES
+                if (count := counters.get(f'role:{role}', 0))
+            ],
+            'ig_count': counters.get('ig_count', 0),
+            'learning_circle_count': counters.get('learning_circle_count', 0),
+            'karma_pow_count': {
+                'karma_count': counters.get('karma_count', 0),
+                'pow_count': counters.get('pow_count', 0),
+            },
+        }
+
+    def schedule_broadcast(self):
+        if not cache.add(self.BROADCAST_PENDING_KEY, True, timeout=self.BROADCAST_INTERVAL):
+            return
+
+        from mu_celery.task import broadcast_landing_stats
+
+        transaction.on_commit(
+            lambda: broadcast_landing_stats.apply_async(countdown=self.BROADCAST_INTERVAL)
+        )
 
-        elif sender == LearningCircle:
-            self.data['learning_circle_count'] = self.learning_circles_count()
+    def broadcast(self):
+        async_to_sync(channel_layer.group_send)(
+            GlobalCount.group_name,
+            {"type": "send_data", "data": self.get_data()}
+        )
 
 
 landing_stats = LandingStats()
@@ -87,39 +184,38 @@ class GlobalCount(WebsocketConsumer):
 
     def connect(self):
         async_to_sync(self.channel_layer.group_add)(
-                self.group_name, 
+                self.group_name,
                 self.channel_name
             )
         self.accept()
 
-        landing_stats.get_data(None)
-        self.data = landing_stats.data
+        self.data = landing_stats.get_data()
 
         self.send(text_data=json.dumps(self.data))
-    
+
     def disconnect(self, code):
         self.channel_layer.group_discard(self.group_name, self.channel_name)
-    
+
     def send_data(self, event):
         self.send(text_data=json.dumps(event['data']))
 
 channel_layer = get_channel_layer()
-    
+
 @receiver(post_save, sender=User)
 @receiver(post_save, sender=LearningCircle)
 @receiver(post_save, sender=InterestGroup)
 @receiver(post_save, sender=UserRoleLink)
 @receiver(post_save, sender=Organization)
+@receiver(post_save, sender=KarmaActivityLog)
 @receiver(post_delete, sender=User)
 @receiver(post_delete, sender=LearningCircle)
 @receiver(post_delete, sender=InterestGroup)
 @receiver(post_delete, sender=UserRoleLink)
 @receiver(post_delete, sender=Organization)
+@receiver(post_delete, sender=KarmaActivityLog)
 def db_signals(sender, instance, created=None, *args, **kwargs):
-    if created or created == None:
-        landing_stats.get_data(sender)
-        data = landing_stats.data
-        async_to_sync(channel_layer.group_send)(
-            "landing_stats",
-            {"type": "send_data", "data": data}
-        )
+    if created is False:
+        return
+    sign = -1 if kwargs.get('signal') == post_delete else 1
+    if landing_stats.update(sender, instance, sign):
+        landing_stats.schedule_broadcast()
@@ -314,9 +314,9 @@ class LcReportDownloadAPI(APIView):
             )
         )
 
-        student_info_data = StudentInfoSerializer(student_info, many=True).data
-
-        return CommonUtils.generate_csv(student_info_data, "Learning Circle Report")
+        return CommonUtils.generate_csv(
+            student_info, "Learning Circle Report", StudentInfoSerializer
+        )
 
 
 class CollegeWiseLcReport(APIView):
@@ -399,9 +399,9 @@ class CollegeWiseLcReportCSV(APIView):
             is_pagination=False
         )
 
-        lc_report = CollegeInfoSerializer(paginated_queryset, many=True).data
-
-        return CommonUtils.generate_csv(lc_report, "Learning Circle Report")
+        return CommonUtils.generate_csv(
+            paginated_queryset, "Learning Circle Report", CollegeInfoSerializer
+        )
 
 
 class LearningCircleEnrollment(APIView):
@@ -494,9 +494,11 @@ class LearningCircleEnrollmentCSV(APIView):
                          "organisation": "organisation", "dwms_id": "dwms_id", "karma_earned": "karma_earned"},
             is_pagination=False)
 
-        lc_enrollment = LearningCircleEnrollmentSerializer(paginated_queryset, many=True).data
-
-        return CommonUtils.generate_csv(lc_enrollment, "Learning Enrollment Report")
+        return CommonUtils.generate_csv(
+            paginated_queryset,
+            "Learning Enrollment Report",
+            LearningCircleEnrollmentSerializer,
+        )
 
 
 class GlobalCountAPI(APIView):
@@ -10,7 +10,7 @@ from utils.response import CustomResponse
 from utils.types import OrganizationType, RoleType
 from utils.utils import CommonUtils
 from . import serializers
-from .dash_campus_helper import get_user_college_link
+from .dash_campus_helper import get_campus_student_details, get_user_college_link
 
 
 class CampusDetailsAPI(APIView):
@@ -214,98 +214,16 @@ class CampusStudentDetailsCSVAPI(APIView):
                 general_message="Campus lead has no college"
             ).get_failure_response()
 
-        if is_alumni:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                    user__user_organization_link_user__is_alumni=is_alumni,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
-            user_org_links = (
-                User.objects.filter(
-                    user_organization_link_user__org=user_org_link.org,
-                    user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                    user_organization_link_user__is_alumni=is_alumni,
-                )
-                .distinct()
-                .annotate(
-                    user_id=F("id"),
-                    email_=F("email"),
-                    mobile_=F("mobile"),
-                    karma=F("wallet_user__karma"),
-                    level=F("user_lvl_link_user__level__name"),
-                    join_date=F("created_at"),
-                    last_karma_gained=F("wallet_user__karma_last_updated_at"),
-                    department=F('user_organization_link_user__department__title'),
-                    graduation_year=F("user_organization_link_user__graduation_year"),
-                    is_alumni=F('user_organization_link_user__is_alumni'),
-                ))
-        else:
-            rank = (
-                Wallet.objects.filter(
-                    user__user_organization_link_user__org=user_org_link.org,
-                    user__user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                )
-                .distinct()
-                .order_by("-karma", "-created_at")
-                .values(
-                    "user_id",
-                    "karma",
-                )
-            )
-
-            ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
-
-            user_org_links = (
-                User.objects.filter(
-                    user_organization_link_user__org=user_org_link.org,
-                    user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
-                )
-                .distinct()
-                .annotate(
-                    user_id=F("id"),
-                    email_=F("email"),
-                    mobile_=F("mobile"),
-                    karma=F("wallet_user__karma"),
-                    level=F("user_lvl_link_user__level__name"),
-                    join_date=F("created_at"),
-                    last_karma_gained=F("wallet_user__karma_last_updated_at"),
-                    department=F('user_organization_link_user__department__title'),
-                    graduation_year=F("user_organization_link_user__graduation_year"),
-                    is_alumni=F('user_organization_link_user__is_alumni'),
-                ))
-
-        paginated_queryset = CommonUtils.get_paginated_queryset(
-            user_org_links,
-            request,
-            ["full_name", "level"],
-            {
-                "full_name": "full_name",
-                "muid": "muid",
-                "karma": "wallet_user__karma",
-                "level": "user_lvl_link_user__level__level_order",
-                # "is_active": "karma_activity_log_user__created_at",
-                "join_date": "created_at",
-                "email": "email_",
-                "mobile": "mobile_",
-                "is_alumni": "is_alumni",
-            },
+        user_org_links, ranks = get_campus_student_details(
+            user_org_link.org, is_alumni
         )
 
-        serializer = serializers.CampusStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        return CommonUtils.generate_csv(
+            user_org_links,
+            "Campus Student Details",
+            serializers.CampusStudentDetailsSerializer,
+            context={"ranks": ranks},
         )
-        return CommonUtils.generate_csv(serializer.data, "Campus Student Details")
 
 
 class WeeklyKarmaAPI(APIView):
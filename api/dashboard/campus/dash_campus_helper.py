@@ -1,4 +1,8 @@
+from django.db.models import F
+
 from db.organization import UserOrganizationLink, Organization
+from db.task import Wallet
+from db.user import User
 from utils.types import OrganizationType
 
 
@@ -7,3 +11,49 @@ def get_user_college_link(user_id):
         user_id=user_id,
         org__org_type=OrganizationType.COLLEGE.value
     ).first()
+
+
+def get_campus_student_details(org, is_alumni=None):
+    """
+    Returns the annotated students of a college and a user_id -> rank map,
+    optionally narrowed to alumni or current students.
+    """
+    link_filter = {
+        "user_organization_link_user__org": org,
+        "user_organization_link_user__org__org_type": OrganizationType.COLLEGE.value,
+    }
+    if is_alumni:
+        link_filter["user_organization_link_user__is_alumni"] = is_alumni
+
+    rank = (
+        Wallet.objects.filter(
+            **{f"user__{field}": value for field, value in link_filter.items()}
+        )
+        .distinct()
+        .order_by("-karma", "-created_at")
+        .values(
+            "user_id",
+            "karma",
+        )
+    )
+
+    ranks = {user["user_id"]: i + 1 for i, user in enumerate(rank)}
+
+    students = (
+        User.objects.filter(**link_filter)
+        .distinct()
+        .annotate(
+            user_id=F("id"),
+            email_=F("email"),
+            mobile_=F("mobile"),
+            karma=F("wallet_user__karma"),
+            level=F("user_lvl_link_user__level__name"),
+            join_date=F("created_at"),
+            last_karma_gained=F("wallet_user__karma_last_updated_at"),
+            department=F("user_organization_link_user__department__title"),
+            graduation_year=F("user_organization_link_user__graduation_year"),
+            is_alumni=F("user_organization_link_user__is_alumni"),
+        )
+    )
+
+    return students, ranks
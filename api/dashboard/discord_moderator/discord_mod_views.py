@@ -1,12 +1,12 @@
-from collections import defaultdict
+from datetime import date
 
-from django.db.models import Q
 from rest_framework.views import APIView
 
 from db.task import KarmaActivityLog
 from utils.utils import CommonUtils
 from utils.permission import CustomizePermission
 from utils.response import CustomResponse
+from .moderator_leaderboard import ModeratorLeaderboard
 from .serializer import KarmaActivityLogSerializer,LeaderboardSerializer
 
 
@@ -60,25 +60,25 @@ class LeaderBoard(APIView):
 
     def get(self, request):
         choice = request.query_params.get("option", "peer")
+        if choice not in ModeratorLeaderboard.TYPES:
+            return CustomResponse(
+                general_message=f"option must be one of {', '.join(ModeratorLeaderboard.TYPES)}"
+            ).get_failure_response()
+
+        try:
+            start, end = (
+                date.fromisoformat(value) if value else None
+                for value in (
+                    request.query_params.get("start_date"),
+                    request.query_params.get("end_date"),
+                )
+            )
+        except ValueError:
+            return CustomResponse(
+                general_message="Dates must be in YYYY-MM-DD format"
+            ).get_failure_response()
 
-        approval_field = f"{choice}_approved_by"
-        logs_with_approval = KarmaActivityLog.objects.filter(
-            Q(**{f"{approval_field}__isnull": False}
-              ) & ~Q(**{approval_field: ''})
-        )
-
-        data = defaultdict(lambda: {"count": 0, "muid": None})
-
-        for obj in logs_with_approval:
-            approver_name = getattr(obj, approval_field).full_name
-            if data[approver_name]["muid"] is None:
-                data[approver_name]["muid"] = getattr(obj, approval_field).muid
-            data[approver_name]["count"] += 1
-
-        response_data = [
-            {"name": name, "count": info["count"], "muid": info["muid"]}
-            for name, info in data.items()
-        ]
+        response_data = ModeratorLeaderboard.get_queryset(choice, start, end)
 
         paginated_queryset = CommonUtils.get_paginated_queryset(
             response_data,
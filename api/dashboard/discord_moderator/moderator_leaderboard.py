@@ -0,0 +1,207 @@
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django_redis import get_redis_connection
+
+from db.settings import SystemSetting
+from db.task import KarmaActivityLog, KarmaApprovalCount
+from utils.utils import DateTimeUtils
+
+
+class ModeratorLeaderboard:
+    """
+    Approval counts per moderator, kept in karma_approval_count.
+
+    Counts are stored per approver, approval type and creation day of the
+    karma activity log. refresh() recounts only the days holding logs updated
+    since the previous refresh, plus the last RECOUNT_DAYS days because the
+    discord bot writes logs directly and may not touch updated_at. Deleted
+    logs leave no updated_at behind, so every table is recounted in full once
+    FULL_RECOUNT_INTERVAL has passed since the last full recount. Until the
+    first refresh the leaderboard is counted from the logs. Only one refresh
+    runs at a time.
+    """
+
+    TYPES = {
+        "peer": "peer_approved_by",
+        "appraiser": "appraiser_approved_by",
+    }
+    LOCK_KEY = "karma_approval_count:refresh_lock"
+    LOCK_TIMEOUT = 60 * 30
+    REFRESHED_KEY = "karma_approval_count.refreshed_at"
+    FULL_REFRESHED_KEY = "karma_approval_count.full_refreshed_at"
+    RECOUNT_DAYS = 7
+    FULL_RECOUNT_INTERVAL = timedelta(days=1)
+
+    @staticmethod
+    def _day_start(day) -> datetime:
+        return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+    @staticmethod
+    def _get_time(key: str):
+        value = (
+            SystemSetting.objects.filter(key=key)
+            .values_list("value", flat=True)
+            .first()
+        )
+        return datetime.fromisoformat(value) if value else None
+
+    @staticmethod
+    def _set_time(key: str, value: datetime) -> None:
+        if not SystemSetting.objects.filter(key=key).update(
+            value=value.isoformat(), updated_at=value
+        ):
+            SystemSetting.objects.create(
+                key=key,
+                value=value.isoformat(),
+                updated_at=value,
+                created_at=value,
+            )
+
+    @classmethod
+    def get_refreshed_at(cls):
+        return cls._get_time(cls.REFRESHED_KEY)
+
+    @classmethod
+    def _approved_logs(cls, approval_type: str):
+        field = cls.TYPES[approval_type]
+        return (
+            KarmaActivityLog.objects.filter(**{f"{field}__isnull": False})
+            .exclude(**{field: ""})
+            .order_by()
+        )
+
+    @classmethod
+    def _days_filter(cls, days) -> Q:
+        return reduce(
+            or_,
+            (
+                Q(
+                    created_at__gte=cls._day_start(day),
+                    created_at__lt=cls._day_start(day + timedelta(days=1)),
+                )
+                for day in days
+            ),
+        )
+
+    @classmethod
+    def refresh(cls) -> None:
+        """
+        Recounts the dirty days. Returns at once if another refresh holds
+        the lock; the next one picks up whatever it misses.
+        """
+        lock = get_redis_connection("default").lock(cls.LOCK_KEY, timeout=cls.LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            cls._refresh()
+        finally:
+            lock.release()
+
+    @classmethod
+    def _refresh(cls) -> None:
+        started = DateTimeUtils.get_current_utc_time()
+        refreshed_at = cls.get_refreshed_at()
+        full_refreshed_at = cls._get_time(cls.FULL_REFRESHED_KEY)
+
+        days = None
+        if (
+            refreshed_at is not None
+            and full_refreshed_at is not None
+            and started - full_refreshed_at < cls.FULL_RECOUNT_INTERVAL
+        ):
+            days = set(
+                KarmaActivityLog.objects.filter(updated_at__gte=refreshed_at)
+                .annotate(day=TruncDate("created_at"))
+                .values_list("day", flat=True)
+                .distinct()
+                .order_by()
+            )
+            days.update(
+                started.date() - timedelta(days=offset)
+                for offset in range(cls.RECOUNT_DAYS)
+            )
+
+        counts = []
+        for approval_type, field in cls.TYPES.items():
+            logs = cls._approved_logs(approval_type)
+            if days is not None:
+                logs = logs.filter(cls._days_filter(days))
+            counts.extend(
+                KarmaApprovalCount(
+                    id=uuid.uuid4(),
+                    approver_id=row[field],
+                    approval_type=approval_type,
+                    date=row["day"],
+                    count=row["count"],
+                )
+                for row in logs.annotate(day=TruncDate("created_at"))
+                .values(field, "day")
+                .annotate(count=Count("id"))
+            )
+
+        with transaction.atomic():
+            stale = KarmaApprovalCount.objects.all()
+            if days is not None:
+                stale = stale.filter(date__in=days)
+            stale.delete()
+            KarmaApprovalCount.objects.bulk_create(counts, batch_size=1000)
+
+            cls._set_time(cls.REFRESHED_KEY, started)
+            if days is None:
+                cls._set_time(cls.FULL_REFRESHED_KEY, started)
+
+    @staticmethod
+    def _schedule_refresh() -> None:
+        if not cache.add("karma_approval_count:refresh_pending", True, timeout=60 * 10):
+            return
+
+        from mu_celery.task import refresh_moderator_leaderboard
+
+        refresh_moderator_leaderboard.delay()
+
+    @classmethod
+    def get_queryset(cls, approval_type: str, start=None, end=None):
+        """
+        Returns approvers with name, muid and count, most approvals first,
+        counting logs created between the start and end days inclusive. The
+        queryset is grouped in the database so a page reads only its rows.
+        """
+        if cls.get_refreshed_at() is None:
+            cls._schedule_refresh()
+            field = cls.TYPES[approval_type]
+            logs = cls._approved_logs(approval_type)
+            if start is not None:
+                logs = logs.filter(created_at__gte=cls._day_start(start))
+            if end is not None:
+                logs = logs.filter(created_at__lt=cls._day_start(end + timedelta(days=1)))
+            return (
+                logs.values(field)
+                .annotate(
+                    name=F(f"{field}__full_name"),
+                    muid=F(f"{field}__muid"),
+                    count=Count("id"),
+                )
+                .order_by("-count", "muid")
+            )
+
+        counts = KarmaApprovalCount.objects.filter(approval_type=approval_type)
+        if start is not None:
+            counts = counts.filter(date__gte=start)
+        if end is not None:
+            counts = counts.filter(date__lte=end)
+        return (
+            counts.values("approver_id")
+            .annotate(
+                name=F("approver__full_name"),
+                muid=F("approver__muid"),
+                count=Sum("count"),
+            )
+            .order_by("-count", "muid")
+        )
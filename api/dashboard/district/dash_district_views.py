@@ -186,10 +186,12 @@ class DistrictStudentDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_district_serializer.DistrictStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        return CommonUtils.generate_csv(
+            user_org_links,
+            "District Student Details",
+            dash_district_serializer.DistrictStudentDetailsSerializer,
+            context={"ranks": ranks},
         )
-        return CommonUtils.generate_csv(serializer.data, "District Student Details")
 
 
 class DistrictsCollageDetailsAPI(APIView):
@@ -295,7 +297,9 @@ class DistrictsCollageDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_district_serializer.DistrictCollegeDetailsSerializer(
-            organizations, many=True, context={"leads": leads}
+        return CommonUtils.generate_csv(
+            organizations,
+            "District College Details",
+            dash_district_serializer.DistrictCollegeDetailsSerializer,
+            context={"leads": leads},
         )
-        return CommonUtils.generate_csv(serializer.data, "District College Details")
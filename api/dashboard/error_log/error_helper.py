@@ -0,0 +1,394 @@
+import json
+import mmap
+import os
+import re
+import sqlite3
+import threading
+from contextlib import suppress
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+
+class ErrorStore:
+    """
+    Structured index of logged exceptions, kept next to error.log.
+
+    Every exception logged by UniversalErrorHandlerMiddleware is grouped by
+    its error id, so the dashboard reads counts, first/last seen and patch
+    status per group instead of re-parsing the text log. Only the latest
+    OCCURRENCE_LIMIT occurrences of a group keep their request details.
+    """
+
+    OCCURRENCE_LIMIT = 20
+    OCCURRENCE_PATTERN = r"OCCURRENCE: (\w+)\n"
+    PATCH_PATTERN = r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) ERROR PATCHED : (\w+)"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS error_group (
+            id TEXT PRIMARY KEY,
+            type TEXT,
+            message TEXT,
+            method TEXT,
+            path TEXT,
+            count INTEGER NOT NULL DEFAULT 0,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            patched_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS error_occurrence (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            auth TEXT,
+            body TEXT,
+            traceback TEXT
+        );
+        CREATE INDEX IF NOT EXISTS error_occurrence_group
+            ON error_occurrence (group_id, seq);
+        CREATE TABLE IF NOT EXISTS error_user (
+            muid TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS pending_occurrence (
+            occurrence TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            path TEXT PRIMARY KEY,
+            inode INTEGER NOT NULL,
+            offset INTEGER NOT NULL
+        );
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def path(cls) -> str:
+        return f"{settings.LOG_PATH}/error_index.sqlite3"
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        path = cls.path()
+        connection = getattr(cls._local, "connection", None)
+        if connection is not None and getattr(cls._local, "path", None) == path:
+            return connection
+
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(cls.SCHEMA)
+        cls._local.connection, cls._local.path = connection, path
+        return connection
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def _muid(auth):
+        return auth.get("muid") if isinstance(auth, dict) else None
+
+    @classmethod
+    def record(
+        cls,
+        error_id: str,
+        type: str,
+        message: str,
+        method: str,
+        path: str,
+        auth=None,
+        body=None,
+        traceback: str = None,
+        timestamp: str = None,
+        occurrence: str = None,
+    ) -> None:
+        connection = cls._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            if occurrence:
+                # marks the entry as indexed for when ingest reaches it in error.log
+                connection.execute(
+                    "INSERT OR IGNORE INTO pending_occurrence (occurrence) VALUES (?)",
+                    (occurrence,),
+                )
+            cls._insert(
+                connection,
+                error_id,
+                type,
+                message,
+                method,
+                path,
+                auth,
+                body,
+                traceback,
+                timestamp or cls._now(),
+            )
+
+    @classmethod
+    def _insert(
+        cls,
+        connection,
+        error_id,
+        type,
+        message,
+        method,
+        path,
+        auth,
+        body,
+        traceback,
+        timestamp,
+    ) -> None:
+        """
+        Adds one occurrence to its group. Runs inside the caller's transaction.
+        """
+        connection.execute(
+            """
+            INSERT INTO error_group
+                (id, type, message, method, path, count, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                count = count + 1,
+                last_seen = MAX(last_seen, excluded.last_seen)
+            """,
+            (error_id, type, message, method, path, timestamp, timestamp),
+        )
+        connection.execute(
+            """
+            INSERT INTO error_occurrence (group_id, timestamp, auth, body, traceback)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                error_id,
+                timestamp,
+                json.dumps(auth, default=str),
+                json.dumps(body, default=str),
+                traceback,
+            ),
+        )
+        connection.execute(
+            """
+            DELETE FROM error_occurrence WHERE group_id = ? AND seq NOT IN (
+                SELECT seq FROM error_occurrence WHERE group_id = ?
+                ORDER BY seq DESC LIMIT ?
+            )
+            """,
+            (error_id, error_id, cls.OCCURRENCE_LIMIT),
+        )
+        if muid := cls._muid(auth):
+            connection.execute(
+                "INSERT OR IGNORE INTO error_user (muid) VALUES (?)", (muid,)
+            )
+
+    @classmethod
+    def patch(cls, error_id: str) -> None:
+        cls._connection().execute(
+            "UPDATE error_group SET patched_at = ? WHERE id = ?",
+            (cls._now(), error_id),
+        )
+
+    @classmethod
+    def clear(cls) -> None:
+        connection = cls._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for table in (
+                "error_group",
+                "error_occurrence",
+                "error_user",
+                "pending_occurrence",
+                "ingest_state",
+            ):
+                connection.execute(f"DELETE FROM {table}")
+
+    @staticmethod
+    def _load(value):
+        with suppress(TypeError, json.JSONDecodeError):
+            return json.loads(value)
+        return value
+
+    @classmethod
+    def get_groups(cls) -> list[dict]:
+        """
+        Returns the unpatched error groups, newest first, in the shape the
+        text log parser produced plus the group's count and first/last seen.
+        """
+        connection = cls._connection()
+        groups = connection.execute(
+            """
+            SELECT * FROM error_group
+            WHERE patched_at IS NULL OR last_seen > patched_at
+            ORDER BY last_seen DESC
+            """
+        ).fetchall()
+
+        errors = []
+        for group in groups:
+            occurrences = connection.execute(
+                """
+                SELECT timestamp, auth, body, traceback FROM error_occurrence
+                WHERE group_id = ? AND timestamp > ?
+                ORDER BY seq DESC
+                """,
+                (group["id"], group["patched_at"] or ""),
+            ).fetchall()
+
+            error = {
+                "id": group["id"],
+                "timestamp": [],
+                "type": [group["type"]],
+                "message": [group["message"]],
+                "method": [group["method"]],
+                "path": [group["path"]],
+                "auth": [],
+                "body": [],
+                "traceback": [],
+                "count": group["count"],
+                "first_seen": datetime.fromisoformat(group["first_seen"]),
+                "last_seen": datetime.fromisoformat(group["last_seen"]),
+            }
+            for occurrence in occurrences:
+                values = {
+                    "timestamp": datetime.fromisoformat(occurrence["timestamp"]),
+                    "auth": cls._load(occurrence["auth"]),
+                    "body": cls._load(occurrence["body"]),
+                    "traceback": occurrence["traceback"],
+                }
+                for key, value in values.items():
+                    if value and value not in error[key]:
+                        error[key].append(value)
+            errors.append(error)
+
+        return errors
+
+    @classmethod
+    def get_path_counts(cls) -> dict:
+        return {
+            row["path"]: row["hits"]
+            for row in cls._connection().execute(
+                "SELECT path, SUM(count) AS hits FROM error_group GROUP BY path"
+            )
+        }
+
+    @classmethod
+    def get_last_seen(cls):
+        last_seen = cls._connection().execute(
+            "SELECT MAX(last_seen) FROM error_group"
+        ).fetchone()[0]
+        return datetime.fromisoformat(last_seen) if last_seen else None
+
+    @classmethod
+    def get_affected_user_count(cls) -> int:
+        return cls._connection().execute("SELECT COUNT(*) FROM error_user").fetchone()[0]
+
+    @classmethod
+    def _checkpoint(cls, path: str):
+        return cls._connection().execute(
+            "SELECT inode, offset FROM ingest_state WHERE path = ?", (path,)
+        ).fetchone()
+
+    @classmethod
+    def _save_checkpoint(cls, path: str, inode: int, offset: int) -> None:
+        cls._connection().execute(
+            """
+            INSERT INTO ingest_state (path, inode, offset) VALUES (?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET inode = excluded.inode, offset = excluded.offset
+            """,
+            (path, inode, offset),
+        )
+
+    @staticmethod
+    def _read_from(path: str, offset: int):
+        """
+        Returns the complete lines appended after offset and the offset just
+        past them. A line still being written is left for the next call.
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size <= offset:
+                return "", offset
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = mapped.rfind(b"\n", offset, size) + 1
+                if end <= offset:
+                    return "", offset
+                return mapped[offset:end].decode("utf-8", errors="replace"), end
+
+    @classmethod
+    def ingest(cls) -> int:
+        """
+        Indexes whatever was appended to error.log since the last call.
+
+        The byte offset and inode of the log are checkpointed, so each call
+        costs only the new bytes. A changed inode (rotation) or a file shorter
+        than the checkpoint (truncation) restarts from the beginning. Entries
+        the middleware already indexed carry a pending occurrence id and are skipped.
+
+        Reading the checkpoint, indexing and advancing it run in one
+        BEGIN IMMEDIATE transaction, so concurrent calls from several
+        requests or workers take turns instead of indexing the same bytes
+        twice.
+        """
+        error_log = f"{settings.LOG_PATH}/error.log"
+        if not os.path.exists(error_log):
+            return 0
+
+        connection = cls._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            return cls._ingest(connection, error_log)
+
+    @classmethod
+    def _ingest(cls, connection, error_log: str) -> int:
+        inode, size = os.stat(error_log).st_ino, os.stat(error_log).st_size
+        checkpoint = cls._checkpoint(error_log)
+        offset = 0
+        if checkpoint and checkpoint["inode"] == inode and checkpoint["offset"] <= size:
+            offset = checkpoint["offset"]
+
+        log_data, offset = cls._read_from(error_log, offset)
+        if not log_data:
+            cls._save_checkpoint(error_log, inode, offset)
+            return 0
+
+        from .log_helper import logHandler
+
+        log_handler = logHandler(log_data)
+        ingested = 0
+        for error in re.findall(log_handler.log_pattern, log_data, re.DOTALL):
+            with suppress(ValueError, TypeError):
+                entry = log_handler.get_values(error, *log_handler.get_patterns())
+                if not entry.get("id"):
+                    continue
+                if (occurrence := re.search(cls.OCCURRENCE_PATTERN, error)) and (
+                    connection.execute(
+                        "DELETE FROM pending_occurrence WHERE occurrence = ?",
+                        (occurrence[1],),
+                    ).rowcount
+                ):
+                    continue
+                cls._insert(
+                    connection,
+                    entry["id"],
+                    entry["type"],
+                    entry["message"],
+                    entry["method"],
+                    entry["path"],
+                    cls._load(entry["auth"]),
+                    cls._load(entry["body"]),
+                    entry["traceback"],
+                    # every entry starts with its "%Y-%m-%d %H:%M:%S,%f" timestamp
+                    log_handler.get_formatted_time(error[:23])
+                    .replace(tzinfo=timezone.utc)
+                    .isoformat(),
+                )
+                ingested += 1
+
+        log_handler.patch_pattern = cls.PATCH_PATTERN
+        for error_id, patched_at in log_handler.extract_patches(log_data).items():
+            connection.execute(
+                """
+                UPDATE error_group SET patched_at = MAX(COALESCE(patched_at, ''), ?)
+                WHERE id = ?
+                """,
+                (patched_at.replace(tzinfo=timezone.utc).isoformat(), error_id),
+            )
+
+        cls._save_checkpoint(error_log, inode, offset)
+        return ingested
@@ -1,15 +1,21 @@
 import logging
 import os
+import re
+from datetime import datetime
 
 from django.conf import settings
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 
 from utils.permission import CustomizePermission, role_required
 from utils.response import CustomResponse
 from utils.types import RoleType
 
-from .log_helper import ManageURLPatterns, logHandler
+from db.user import User
+from utils.utils import DateTimeUtils
+
+from .error_helper import ErrorStore
+from .log_helper import LogReader, ManageURLPatterns, get_route_matcher
 
 
 class DownloadErrorLogAPI(APIView):
@@ -19,31 +25,123 @@ class DownloadErrorLogAPI(APIView):
         [RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.TECH_TEAM.value]
     )
     def get(self, request, log_name):
+        """
+        Downloads a log file. `?gzip=true` streams it gzip-compressed, and
+        otherwise a single `Range: bytes=...` header is honoured with a 206.
+        """
         error_log = f"{settings.LOG_PATH}/{log_name}.log"
-        if os.path.exists(error_log):
+        if not os.path.exists(error_log):
+            return CustomResponse(
+                general_message=f"{log_name} Not Found"
+            ).get_failure_response()
+
+        reader = LogReader(error_log)
+
+        if request.query_params.get("gzip") == "true":
+            response = StreamingHttpResponse(
+                reader.iter_gzip(), content_type="application/gzip"
+            )
+            response["Content-Disposition"] = f'attachment; filename="{log_name}.log.gz"'
+            return response
+
+        if range_header := request.headers.get("Range"):
+            if (byte_range := self.parse_range(range_header, reader.size)) is None:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{reader.size}"
+                return response
+
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                reader.iter_bytes(start, end),
+                status=206,
+                content_type="application/octet-stream",
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{reader.size}"
+            response["Content-Length"] = end - start + 1
+        else:
             response = FileResponse(
                 open(error_log, "rb"), content_type="application/octet-stream"
             )
-            response["Content-Disposition"] = f'attachment; filename="{log_name}"'
-            return response
-        return CustomResponse(
-            general_message=f"{log_name} Not Found"
-        ).get_failure_response()
+
+        response["Accept-Ranges"] = "bytes"
+        response["Content-Disposition"] = f'attachment; filename="{log_name}"'
+        return response
+
+    @staticmethod
+    def parse_range(range_header: str, size: int):
+        """
+        Parses a single `bytes=start-end`, `bytes=start-` or `bytes=-suffix`
+        range into inclusive offsets, or None if it cannot be satisfied.
+        """
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+        if not match or not any(match.groups()) or size == 0:
+            return None
+
+        start, end = match.groups()
+        if not start:
+            # a zero-length suffix ("bytes=-0") selects nothing
+            return (max(0, size - int(end)), size - 1) if int(end) else None
+
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+        return (start, end) if start <= end else None
 
 
 class ViewErrorLogAPI(APIView):
     authentication_classes = [CustomizePermission]
+    DEFAULT_LIMIT = 256 * 1024
+    MAX_LIMIT = 2 * 1024 * 1024
+    MAX_TAIL_LINES = 10000
+    PAGE_PARAMS = ("tail", "start", "end", "offset", "limit")
+
+    @staticmethod
+    def parse_time(value):
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S") if value else None
 
     @role_required(
         [RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.TECH_TEAM.value]
     )
     def get(self, request, log_name):
+        """
+        Returns one page of whole lines from a log file.
+
+        Query params: `tail` (last N lines), `start`/`end` ("%Y-%m-%d %H:%M:%S"
+        time range), or `offset` (byte offset from a previous page's
+        `next_offset`). `limit` caps the page size in bytes. With any of them
+        the response is {content, offset, next_offset, size}; without, it
+        stays the plain string it always was, holding the latest
+        DEFAULT_LIMIT bytes of whole lines.
+        """
         error_log = f"{settings.LOG_PATH}/{log_name}.log"
         if os.path.exists(error_log):
             try:
-                with open(error_log, "r") as log_file:
-                    log_content = log_file.read()
-                return CustomResponse(response=log_content).get_success_response()
+                reader = LogReader(error_log)
+                params = request.query_params
+                limit = min(
+                    int(params.get("limit", self.DEFAULT_LIMIT)), self.MAX_LIMIT
+                )
+                if limit <= 0:
+                    raise ValueError(limit)
+
+                if not any(params.get(param) for param in self.PAGE_PARAMS):
+                    page = reader.read(max(0, reader.size - limit), limit)
+                    return CustomResponse(response=page["content"]).get_success_response()
+
+                if tail := params.get("tail"):
+                    page = reader.tail(max(0, min(int(tail), self.MAX_TAIL_LINES)))
+                elif params.get("start") or params.get("end"):
+                    page = reader.read_range(
+                        self.parse_time(params.get("start")),
+                        self.parse_time(params.get("end")),
+                        limit,
+                    )
+                else:
+                    page = reader.read(max(0, int(params.get("offset", 0))), limit)
+
+                return CustomResponse(response=page).get_success_response()
+            except ValueError:
+                return CustomResponse(
+                    general_message="Invalid offset, limit, tail or time range"
+                ).get_failure_response()
             except Exception as e:
                 return CustomResponse(
                     general_message="Error reading log file"
@@ -66,6 +164,8 @@ class ClearErrorLogAPI(APIView):
             try:
                 with open(error_log, "w") as log_file:
                     log_file.truncate(0)
+                if log_name == "error":
+                    ErrorStore.clear()
                 return CustomResponse(
                     general_message=f"{log_name} log cleared successfully"
                 ).get_success_response()
@@ -120,15 +220,12 @@ class LoggerAPI(APIView):
             >>> logger_api = LoggerAPI()
             >>> response = logger_api.get(request)
         """
-        error_log = f"{settings.LOG_PATH}/error.log"
         try:
-            with open(error_log, "r") as file:
-                log_data = file.read()
-        except IOError as e:
+            ErrorStore.ingest()
+            formatted_errors = ErrorStore.get_groups()
+        except Exception as e:
             return CustomResponse(response=str(e)).get_failure_response()
 
-        log_handler = logHandler(log_data)
-        formatted_errors = log_handler.parse_logs()
         return CustomResponse(response=formatted_errors).get_success_response()
 
     @role_required(
@@ -151,6 +248,7 @@ class LoggerAPI(APIView):
         """
         logger = logging.getLogger("django")
         logger.error(f"PATCHED : {error_id}")
+        ErrorStore.patch(error_id)
         return CustomResponse(response="Updated patch list").get_success_response()
 
 
@@ -182,22 +280,34 @@ class ErrorGraphAPI(APIView):
 
         """
         try:
-            error_log = f"{settings.LOG_PATH}/error.log"
-
-            with open(error_log, "r") as file:
-                log_data = file.read()
-
-            log_handler = logHandler(log_data)
+            ErrorStore.ingest()
+            heatmap = {}
+            route_matcher = get_route_matcher()
+            for path, hits in ErrorStore.get_path_counts().items():
+                if route := route_matcher.route(path):
+                    heatmap[route] = heatmap.get(route, 0) + hits
+
+            incident_info = {"last_incident": None, "time_since_then": None}
+            if last_incident := ErrorStore.get_last_seen():
+                incident_info = {
+                    "last_incident": last_incident,
+                    "time_since_then": (
+                        DateTimeUtils.get_current_utc_time() - last_incident
+                    ).total_seconds(),
+                }
 
             formatted_errors = {
-                "heatmap": log_handler.get_urls_heatmap(),
-                "incident_info": log_handler.get_incident_info(),
-                "affected_users": log_handler.get_affected_users(),
+                "heatmap": heatmap,
+                "incident_info": incident_info,
+                "affected_users": (
+                    ErrorStore.get_affected_user_count() / User.objects.count()
+                )
+                * 100,
             }
 
             return CustomResponse(response=formatted_errors).get_success_response()
 
-        except IOError as e:
+        except Exception as e:
             return CustomResponse(response=str(e)).get_failure_response()
 
 
@@ -229,18 +339,13 @@ class ErrorTabAPI(APIView):
 
         """
         try:
-            error_log = f"{settings.LOG_PATH}/error.log"
-
-            with open(error_log, "r") as file:
-                log_data = file.read()
+            ErrorStore.ingest()
+            parsed_errors = ErrorStore.get_groups()
 
-            log_handler = logHandler(log_data)
-            parsed_errors = log_handler.parse_logs()
-        
             urlpatterns = ManageURLPatterns().urlpatterns
             grouped_patterns = ManageURLPatterns.group_patterns(urlpatterns)
 
             return CustomResponse(response=parsed_errors).get_success_response()
 
-        except IOError as e:
+        except Exception as e:
             return CustomResponse(response=str(e)).get_failure_response()
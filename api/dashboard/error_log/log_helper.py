@@ -1,14 +1,68 @@
 import json
+import os
 import re
+import zlib
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
-from django.urls import Resolver404, URLPattern, URLResolver, get_resolver, resolve
+from django.urls import URLPattern, URLResolver, get_resolver
 
 from db.user import User
 from utils.utils import DateTimeUtils
 
 
+class RouteMatcher:
+    """
+    Flattened, precompiled view of the URL tree for resolving request paths
+    to their route.
+
+    The resolver is walked once; every endpoint becomes one anchored regex
+    in resolver order, so the first match is the route Django would pick.
+    Results are memoised per path in a bounded LRU.
+    """
+
+    MEMO_SIZE = 4096
+
+    def __init__(self, url_patterns):
+        self.routes = []
+        self._flatten(url_patterns, "", "")
+        self.match = lru_cache(maxsize=self.MEMO_SIZE)(self._match)
+
+    @staticmethod
+    def _regex(pattern) -> str:
+        # group names repeat across nesting levels, and only the route is needed
+        return re.sub(r"\(\?P<\w+>", "(?:", pattern.pattern.regex.pattern.lstrip("^"))
+
+    def _flatten(self, url_patterns, route_prefix, regex_prefix):
+        for pattern in url_patterns:
+            route = route_prefix + str(pattern.pattern)
+            regex = regex_prefix + self._regex(pattern)
+            if isinstance(pattern, URLPattern):
+                self.routes.append((re.compile(regex), route, pattern.name))
+            elif isinstance(pattern, URLResolver):
+                self._flatten(pattern.url_patterns, route, regex)
+
+    def _match(self, path: str):
+        """
+        Returns (route, url_name) for a request path, or None if no route
+        matches it.
+        """
+        path = path[1:] if path.startswith("/") else path
+        for regex, route, url_name in self.routes:
+            if regex.match(path):
+                return route, url_name
+        return None
+
+    def route(self, path: str):
+        return match[0] if (match := self.match(path)) else None
+
+
+@lru_cache(maxsize=None)
+def get_route_matcher() -> RouteMatcher:
+    return RouteMatcher(get_resolver().url_patterns)
+
+
 def check_url_match(url_to_check: str, pattern_to_match: str) -> bool:
     """
     Check if the given URL matches the specified pattern.
@@ -20,11 +74,8 @@ def check_url_match(url_to_check: str, pattern_to_match: str) -> bool:
     Returns:
         bool: True if the URL matches the pattern, False otherwise.
     """
-    try:
-        match = resolve(url_to_check)
-        return match.url_name == pattern_to_match
-    except Resolver404:
-        return False
+    match = get_route_matcher().match(url_to_check)
+    return match is not None and match[1] == pattern_to_match
 
 
 class ManageURLPatterns:
@@ -35,46 +86,17 @@ class ManageURLPatterns:
         Args:
             self: The instance of the class itself.
         """
-        self._url_patterns_cache = None
         self.urlpatterns = self._get_url_patterns()
 
     def _get_url_patterns(self):
         """
-        Get the URL patterns by extracting them from the resolver.
-
-        Returns:
-            list: The list of extracted URL patterns.
-        """
-        if self._url_patterns_cache is not None:
-            return self._url_patterns_cache
-        self._url_patterns_cache = self._extract_url_patterns(
-            get_resolver().url_patterns
-        )
-        return self._url_patterns_cache
-
-    def _extract_url_patterns(self, url_patterns, prefix=""):
-        """
-        Recursively extract URL patterns including those nested within 'include()'.
-
-        Args:
-            url_patterns (list): The list of URL patterns to extract from.
-            prefix (str): The prefix to prepend to the extracted patterns.
+        Get the URL patterns from the route matcher, which walks the
+        resolver only once per process.
 
         Returns:
             list: The list of extracted URL patterns.
         """
-        all_patterns = []
-        for pattern in url_patterns:
-            if isinstance(pattern, URLPattern):
-                # This is a final URL pattern
-                all_patterns.append(prefix + str(pattern.pattern))
-            elif isinstance(pattern, URLResolver):
-                # This is an 'include()' pattern, recurse into it
-                nested_patterns = self._extract_url_patterns(
-                    pattern.url_patterns, prefix + str(pattern.pattern)
-                )
-                all_patterns.extend(nested_patterns)
-        return all_patterns
+        return [route for _, route, _ in get_route_matcher().routes]
 
     @classmethod
     def group_patterns(cls, urlpatterns):
@@ -269,11 +291,12 @@ class logHandler:
             dict: the number of times each url is hit
         """
         url_hits = {}
+        route_matcher = get_route_matcher()
 
         for url_hit in re.finditer(self.log_entries["path"]["regex"], self.log_data):
             hit = url_hit.group(1)
-            resolved = resolve(hit)
-            matched_pattern = resolved.route
+            if (matched_pattern := route_matcher.route(hit)) is None:
+                continue
 
             if matched_pattern in url_hits:
                 url_hits[matched_pattern] += 1
@@ -315,3 +338,123 @@ class logHandler:
         )
 
         return (len(affected_users) / User.objects.count()) * 100
+
+
+class LogReader:
+    """
+    Reads slices of a log file without loading the whole file.
+
+    Every slice starts and ends on a line boundary; positions are byte
+    offsets that callers pass back to continue reading.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+    TIMESTAMP_PATTERN = re.compile(rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3} ")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def _line_start(self, file, position: int) -> int:
+        """Moves forward from position to the start of the next full line."""
+        if position <= 0:
+            return 0
+        file.seek(position - 1)
+        file.readline()
+        return min(file.tell(), self.size)
+
+    def read(self, offset: int, limit: int) -> dict:
+        """
+        Returns up to limit bytes of whole lines starting at offset. A single
+        line longer than limit is returned whole.
+        """
+        with open(self.path, "rb") as file:
+            start = self._line_start(file, offset)
+            file.seek(start)
+            data = file.read(limit)
+            if data and not data.endswith(b"\n") and start + len(data) < self.size:
+                if (cut := data.rfind(b"\n")) >= 0:
+                    data = data[: cut + 1]
+                else:
+                    data += file.readline()
+
+        return self._page(start, data)
+
+    def tail(self, lines: int) -> dict:
+        """
+        Returns the last `lines` lines by reading blocks backwards from the
+        end of the file until enough newlines are found.
+        """
+        with open(self.path, "rb") as file:
+            position = self.size
+            data = b""
+            while position > 0 and data.count(b"\n") <= lines:
+                step = min(self.BLOCK_SIZE, position)
+                position -= step
+                file.seek(position)
+                data = file.read(step) + data
+
+        kept = data.splitlines(keepends=True)[-lines:] if lines > 0 else []
+        data = b"".join(kept)
+        return self._page(self.size - len(data), data)
+
+    def _timestamp_at(self, file, position: int):
+        """
+        Returns the first timestamp at or after position along with the
+        offset of its line, or (None, size) when there is none.
+        """
+        line_start = self._line_start(file, position)
+        file.seek(line_start)
+        while line_start < self.size:
+            line = file.readline()
+            if match := self.TIMESTAMP_PATTERN.match(line):
+                return datetime.strptime(match[1].decode(), "%Y-%m-%d %H:%M:%S"), line_start
+            line_start += len(line)
+        return None, self.size
+
+    def find(self, timestamp: datetime) -> int:
+        """
+        Binary searches the byte offset of the first entry logged at or
+        after timestamp. Lines without a timestamp belong to the entry above.
+        """
+        with open(self.path, "rb") as file:
+            low, high = 0, self.size
+            while low < high:
+                middle = (low + high) // 2
+                found, line_start = self._timestamp_at(file, middle)
+                if found is None or found >= timestamp:
+                    high = middle
+                else:
+                    low = line_start + 1
+            return self._timestamp_at(file, low)[1]
+
+    def read_range(self, start: datetime, end: datetime, limit: int) -> dict:
+        offset = self.find(start) if start else 0
+        end_offset = self.find(end + timedelta(seconds=1)) if end else self.size
+        return self.read(offset, max(0, min(limit, end_offset - offset)))
+
+    def _page(self, start: int, data: bytes) -> dict:
+        end = start + len(data)
+        return {
+            "content": data.decode("utf-8", errors="replace"),
+            "offset": start,
+            "next_offset": end if end < self.size else None,
+            "size": self.size,
+        }
+
+    def iter_bytes(self, start: int = 0, end: int = None, chunk_size: int = BLOCK_SIZE):
+        """Yields the raw bytes between start and end (inclusive)."""
+        end = self.size - 1 if end is None else end
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0 and (chunk := file.read(min(chunk_size, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+
+    def iter_gzip(self, chunk_size: int = BLOCK_SIZE):
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        for chunk in self.iter_bytes(chunk_size=chunk_size):
+            if compressed := compressor.compress(chunk):
+                yield compressed
+        yield compressor.flush()
@@ -0,0 +1,299 @@
+import csv
+import gzip
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import openpyxl
+from decouple import config as decouple_config
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+
+from api.dashboard.campus.dash_campus_helper import (
+    get_campus_student_details,
+    get_user_college_link,
+)
+from api.dashboard.campus.serializers import CampusStudentDetailsSerializer
+from api.dashboard.user.dash_user_serializer import UserDashboardSerializer
+from db.user import User
+from utils.exception import CustomException
+from utils.types import RoleType
+from utils.utils import CommonUtils
+
+
+def _users_scope(user_id):
+    return "all"
+
+
+def _users_export(user_id, params):
+    queryset = User.objects.select_related(
+        "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
+    ).all()
+    return queryset, UserDashboardSerializer, {}
+
+
+def _campus_scope(user_id):
+    user_org_link = get_user_college_link(user_id)
+    if not user_org_link or user_org_link.org_id is None:
+        raise CustomException("Campus lead has no college")
+    return user_org_link.org_id
+
+
+def _campus_students_export(user_id, params):
+    org = get_user_college_link(user_id).org
+    queryset, ranks = get_campus_student_details(org, params.get("is_alumni"))
+    return queryset, CampusStudentDetailsSerializer, {"ranks": ranks}
+
+
+class ExportJob:
+    """
+    Background CSV/XLSX exports written to EXPORT_ROOT by a Celery worker.
+
+    Job state lives in the cache. Requests for the same export, scope and
+    parameters within EXPORT_JOB_TTL_SECONDS share one job and its artifact.
+    A job can be seen by its creator and by users with the same scope, and
+    its artifact is downloaded through a signed link that expires after
+    EXPORT_DOWNLOAD_URL_SECONDS. A pending or running job that has not
+    been saved for EXPORT_JOB_STALE_SECONDS is treated as failed, since its
+    worker has died.
+    """
+
+    KEY_PREFIX = "export_job"
+    TTL = settings.EXPORT_JOB_TTL_SECONDS
+    STALE_SECONDS = settings.EXPORT_JOB_STALE_SECONDS
+    FORMATS = ["csv", "xlsx"]
+    SIGNING_SALT = "export_job.download"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    EXPORTS = {
+        "users": {
+            "name": "User",
+            "roles": [RoleType.ADMIN.value],
+            "params": [],
+            "scope": _users_scope,
+            "build": _users_export,
+        },
+        "campus-students": {
+            "name": "Campus Student Details",
+            "roles": [RoleType.CAMPUS_LEAD.value, RoleType.LEAD_ENABLER.value],
+            "params": ["is_alumni"],
+            "scope": _campus_scope,
+            "build": _campus_students_export,
+        },
+    }
+
+    @classmethod
+    def _key(cls, job_id) -> str:
+        return f"{cls.KEY_PREFIX}:{job_id}"
+
+    @staticmethod
+    def _storage() -> FileSystemStorage:
+        return FileSystemStorage(location=settings.EXPORT_ROOT)
+
+    @classmethod
+    def _save(cls, job) -> dict:
+        job["heartbeat_at"] = int(time.time())
+        cache.set(cls._key(job["id"]), job, timeout=cls.TTL)
+        return job
+
+    @classmethod
+    def get(cls, job_id):
+        job = cache.get(cls._key(job_id))
+        if (
+            job
+            and job["status"] in (cls.PENDING, cls.RUNNING)
+            and time.time() - job.get("heartbeat_at", job["created_at"]) > cls.STALE_SECONDS
+        ):
+            job["status"] = cls.FAILED
+            job["error"] = "Export stopped responding"
+        return job
+
+    @classmethod
+    def has_access(cls, export, roles) -> bool:
+        return any(role in cls.EXPORTS[export]["roles"] for role in roles)
+
+    @classmethod
+    def can_view(cls, job, user_id, roles) -> bool:
+        if not cls.has_access(job["export"], roles):
+            return False
+        if job["user_id"] == user_id:
+            return True
+        try:
+            return str(cls.EXPORTS[job["export"]]["scope"](user_id)) == job["scope"]
+        except CustomException:
+            return False
+
+    @classmethod
+    def public(cls, job) -> dict:
+        """
+        Returns the job as shown to the requester, with a fresh signed link
+        to the artifact once it is done.
+        """
+        job = {key: value for key, value in job.items() if key != "artifact"}
+        if job["status"] == cls.DONE:
+            token = signing.dumps(job["id"], salt=cls.SIGNING_SALT)
+            path = reverse("export-job-download", kwargs={"token": token})
+            job["url"] = f"{decouple_config('BE_DOMAIN_NAME')}{path}"
+        return job
+
+    @classmethod
+    def open_artifact(cls, token):
+        """
+        Returns the finished job and its open artifact for a signed download
+        token, or raises CustomException if the link is invalid or expired.
+        """
+        try:
+            job_id = signing.loads(
+                token, salt=cls.SIGNING_SALT, max_age=settings.EXPORT_DOWNLOAD_URL_SECONDS
+            )
+        except signing.BadSignature as e:
+            raise CustomException("Download link is invalid or has expired") from e
+
+        job = cls.get(job_id)
+        if not job or job["status"] != cls.DONE:
+            raise CustomException("Export job not found or expired")
+        try:
+            return job, cls._storage().open(job["artifact"], "rb")
+        except FileNotFoundError as e:
+            raise CustomException("Export job not found or expired") from e
+
+    @classmethod
+    def enqueue(cls, export, file_format, user_id, params) -> dict:
+        """
+        Returns the live job for an identical request, or queues a new one.
+        """
+        if export not in cls.EXPORTS:
+            raise CustomException("Invalid export")
+        if file_format not in cls.FORMATS:
+            raise CustomException(f"Format must be one of {', '.join(cls.FORMATS)}")
+
+        params = {
+            param: value
+            for param, value in params.items()
+            if param in cls.EXPORTS[export]["params"]
+        }
+        scope = str(cls.EXPORTS[export]["scope"](user_id))
+        fingerprint = hashlib.sha1(
+            json.dumps([export, file_format, scope, params], sort_keys=True).encode()
+        ).hexdigest()
+        fingerprint_key = f"{cls.KEY_PREFIX}:fingerprint:{fingerprint}"
+
+        if (job_id := cache.get(fingerprint_key)) and (job := cls.get(job_id)):
+            if job["status"] != cls.FAILED:
+                return job
+
+        job = cls._save(
+            {
+                "id": str(uuid.uuid4()),
+                "export": export,
+                "format": file_format,
+                "params": params,
+                "user_id": user_id,
+                "scope": scope,
+                "status": cls.PENDING,
+                "progress": 0,
+                "rows": 0,
+                "total": None,
+                "url": None,
+                "artifact": None,
+                "error": None,
+                "created_at": int(time.time()),
+            }
+        )
+        cache.set(fingerprint_key, job["id"], timeout=cls.TTL)
+
+        from mu_celery.task import run_export_job
+
+        run_export_job.delay(job["id"])
+        return job
+
+    @classmethod
+    def run(cls, job_id) -> None:
+        if not (job := cls.get(job_id)) or job["status"] != cls.PENDING:
+            return
+
+        export = cls.EXPORTS[job["export"]]
+        job["status"] = cls.RUNNING
+        cls._save(job)
+
+        try:
+            queryset, serializer_class, context = export["build"](
+                job["user_id"], job["params"]
+            )
+            job["total"] = queryset.count()
+            cls._save(job)
+
+            fs = cls._storage()
+            extension = "csv.gz" if job["format"] == "csv" else "xlsx"
+            name = f"{export['name']} {job['id']}.{extension}"
+            os.makedirs(fs.location, exist_ok=True)
+
+            chunks = CommonUtils.iter_row_chunks(queryset, serializer_class, context)
+            writer = cls._write_csv if job["format"] == "csv" else cls._write_xlsx
+            writer(fs.path(name), chunks, job)
+
+            job["status"] = cls.DONE
+            job["progress"] = 100
+            job["artifact"] = name
+        except Exception as e:
+            job["status"] = cls.FAILED
+            job["error"] = str(e)
+        cls._save(job)
+
+    @classmethod
+    def _track(cls, job, rows) -> None:
+        job["rows"] += rows
+        if job["total"]:
+            job["progress"] = min(99, job["rows"] * 100 // job["total"])
+        cls._save(job)
+
+    @classmethod
+    def _write_csv(cls, path, chunks, job) -> None:
+        with gzip.open(path, "wt", newline="") as file:
+            writer = None
+            for chunk in chunks:
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(chunk[0].keys()))
+                    writer.writeheader()
+                writer.writerows(chunk)
+                cls._track(job, len(chunk))
+
+    @classmethod
+    def _write_xlsx(cls, path, chunks, job) -> None:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        fieldnames = None
+        for chunk in chunks:
+            if fieldnames is None:
+                fieldnames = list(chunk[0].keys())
+                sheet.append(fieldnames)
+            for row in chunk:
+                sheet.append([cls._cell(row.get(field)) for field in fieldnames])
+            cls._track(job, len(chunk))
+        workbook.save(path)
+
+    @staticmethod
+    def _cell(value):
+        return value if value is None or isinstance(value, (int, float, bool)) else str(value)
+
+    @classmethod
+    def purge_artifacts(cls) -> None:
+        """
+        Deletes artifacts older than the job TTL, since no job can point at them.
+        """
+        fs = cls._storage()
+        if not os.path.isdir(fs.location):
+            return
+        expired_before = time.time() - cls.TTL
+        for name in fs.listdir("")[1]:
+            if os.path.getmtime(fs.path(name)) < expired_before:
+                fs.delete(name)
@@ -0,0 +1,72 @@
+from django.http import FileResponse
+from rest_framework.views import APIView
+
+from utils.exception import CustomException
+from utils.permission import CustomizePermission, JWTUtils
+from utils.response import CustomResponse
+from .export_helper import ExportJob
+
+
+class ExportJobAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    def post(self, request, export):
+        if export not in ExportJob.EXPORTS:
+            return CustomResponse(
+                general_message="Invalid export"
+            ).get_failure_response()
+
+        if not ExportJob.has_access(export, JWTUtils.fetch_role(request)):
+            return CustomResponse(
+                general_message="You do not have the required role to access this page."
+            ).get_failure_response()
+
+        params = request.data.get("params") or {}
+        if not isinstance(params, dict):
+            return CustomResponse(
+                general_message="params must be an object"
+            ).get_failure_response()
+
+        try:
+            job = ExportJob.enqueue(
+                export,
+                request.data.get("format", "csv"),
+                JWTUtils.fetch_user_id(request),
+                params,
+            )
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return CustomResponse(response=ExportJob.public(job)).get_success_response()
+
+
+class ExportJobStatusAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    def get(self, request, job_id):
+        if not (job := ExportJob.get(job_id)):
+            return CustomResponse(
+                general_message="Export job not found or expired"
+            ).get_failure_response()
+
+        if not ExportJob.can_view(
+            job, JWTUtils.fetch_user_id(request), JWTUtils.fetch_role(request)
+        ):
+            return CustomResponse().get_unauthorized_response()
+
+        return CustomResponse(response=ExportJob.public(job)).get_success_response()
+
+
+class ExportJobDownloadAPI(APIView):
+    """
+    Serves an artifact for the signed link handed out by the status API, so
+    the link works from a browser without the bearer token.
+    """
+
+    def get(self, request, token):
+        try:
+            job, file = ExportJob.open_artifact(token)
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
+
+        return FileResponse(file, as_attachment=True, filename=job["artifact"])
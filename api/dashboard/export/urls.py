@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import export_views
+
+urlpatterns = [
+    path('download/<str:token>/', export_views.ExportJobDownloadAPI.as_view(), name='export-job-download'),
+    path('status/<str:job_id>/', export_views.ExportJobStatusAPI.as_view(), name='export-job-status'),
+    path('<str:export>/', export_views.ExportJobAPI.as_view(), name='export-job-create'),
+]
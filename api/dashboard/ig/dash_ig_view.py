@@ -205,9 +205,9 @@ class InterestGroupCSV(APIView):
             .all()
         )
 
-        ig_serializer_data = InterestGroupSerializer(ig_serializer, many=True).data
-
-        return CommonUtils.generate_csv(ig_serializer_data, "Interest Group")
+        return CommonUtils.generate_csv(
+            ig_serializer, "Interest Group", InterestGroupSerializer
+        )
 
 
 class InterestGroupGetAPI(APIView):
@@ -5,59 +5,7 @@ from db.task import VoucherLog, TaskList
 from db.user import User
 from utils.permission import JWTUtils
 from utils.utils import DateTimeUtils
-from utils.karma_voucher import generate_ordered_id
-
-
-class VoucherLogCSVSerializer(serializers.ModelSerializer):
-    user_id = serializers.CharField(required=True, allow_null=False)
-    task_id = serializers.CharField(required=True, allow_null=False)
-    created_by_id = serializers.CharField(required=True, allow_null=False)
-    updated_by_id = serializers.CharField(required=True, allow_null=False)
-    week = serializers.CharField(required=False, allow_null=True)
-
-    class Meta:
-        model = VoucherLog
-        fields = [
-            'id',
-            'code',
-            'user_id',
-            'task_id',
-            'karma',
-            'month',
-            'week',
-            'claimed',
-            'created_by_id',
-            'updated_by_id',
-            'created_at',
-            'updated_at',
-            'event',
-            'description'
-        ]
-
-    def validate(self, data):
-        response_data = {}
-        response_data["code"] = data.get('code')
-        week = data.get('week')
-        if week and len(str(week)) > 2:
-            response_data["error"] = "Week must not exceed 2 characters in length and should be of the format 'W1'"
-            raise serializers.ValidationError(response_data)
-        return data
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-
-        representation['code'] = instance.code
-        representation['full_name'] = instance.user.full_name
-        representation['email'] = instance.user.email
-        representation['muid'] = instance.user.muid
-        representation['hashtag'] = instance.task.hashtag
-        representation['month'] = instance.month
-        representation['karma'] = instance.karma
-        representation['week'] = instance.week if instance.week else None
-        representation['description'] = instance.description if instance.description else None
-        representation['event'] = instance.event if instance.event else None
-
-        return representation
+from utils.karma_voucher import reserve_ordered_ids
 
 
 class VoucherLogSerializer(serializers.ModelSerializer):
@@ -121,12 +69,7 @@ class VoucherLogCreateSerializer(serializers.ModelSerializer):
         validated_data['task_id'] = validated_data.pop('task')
         validated_data['id'] = uuid.uuid4()
 
-        existing_codes = set(VoucherLog.objects.values_list('code', flat=True))
-        count = 1
-        while generate_ordered_id(count) in existing_codes:
-            count += 1
-
-        validated_data['code'] = generate_ordered_id(count)
+        validated_data['code'] = reserve_ordered_ids(1)[0]
         validated_data['claimed'] = False
         validated_data['updated_by_id'] = user_id
         validated_data['updated_at'] = DateTimeUtils.get_current_utc_time()
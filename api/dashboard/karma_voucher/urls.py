@@ -6,6 +6,7 @@ urlpatterns = [
     path('', karma_voucher_view.VoucherLogAPI.as_view()),
     path('import/', karma_voucher_view.ImportVoucherLogAPI.as_view()),
     path('export/', karma_voucher_view.ExportVoucherLogAPI.as_view()),
+    path('delivery/<str:batch_id>/', karma_voucher_view.VoucherDeliveryStatusAPI.as_view()),
 
     path('create/', karma_voucher_view.VoucherLogAPI.as_view()),
     path('update/<str:voucher_id>/', karma_voucher_view.VoucherLogAPI.as_view()),
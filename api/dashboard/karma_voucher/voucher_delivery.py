@@ -0,0 +1,180 @@
+import logging
+import time
+import uuid
+from email.mime.image import MIMEImage
+
+import decouple
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from utils.karma_voucher import generate_karma_voucher
+
+logger = logging.getLogger(__name__)
+
+
+class VoucherDelivery:
+    """
+    Renders karma voucher cards and mails them from Celery workers.
+
+    A batch is split into CHUNK_SIZE chunks that run as a Celery group, so
+    rendering fans out over the worker pool. Each chunk sends its mails over
+    one SMTP connection. Per-voucher status lives in a Redis hash keyed by
+    voucher code, which chunks update independently.
+    """
+
+    KEY_PREFIX = "voucher_delivery"
+    TTL = 60 * 60 * 24 * 7
+    CHUNK_SIZE = settings.VOUCHER_DELIVERY_CHUNK_SIZE
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    SUBJECT = "Congratulations on earning Karma points!"
+
+    @classmethod
+    def _key(cls, batch_id) -> str:
+        return f"{cls.KEY_PREFIX}:{batch_id}"
+
+    @classmethod
+    def build_message(cls, voucher, connection=None) -> EmailMessage:
+        """
+        voucher needs code, full_name, email, hashtag, karma and the
+        time_or_event text printed on the card.
+        """
+        text = f"""Greetings from GTech µLearn!
+
+            Great news! You are just one step away from claiming your internship/contribution Karma points.
+
+            Name: {voucher['full_name']}
+            Email: {voucher['email']}
+
+            To claim your karma points copy this `voucher {voucher['code']}` and paste it #task-dropbox channel along with your voucher image.
+            """
+        karma_voucher_image = generate_karma_voucher(
+            name=str(voucher['full_name']),
+            karma=str(int(voucher['karma'])),
+            code=voucher['code'],
+            hashtag=voucher['hashtag'],
+            month=voucher['time_or_event'],
+        )
+        email_obj = EmailMessage(
+            subject=cls.SUBJECT,
+            body=text,
+            from_email=decouple.config("FROM_MAIL"),
+            to=[voucher['email']],
+            connection=connection,
+        )
+        attachment = MIMEImage(karma_voucher_image.getvalue())
+        attachment.add_header(
+            'Content-Disposition',
+            'attachment',
+            filename=f"{str(voucher['full_name'])}.jpg",
+        )
+        email_obj.attach(attachment)
+        return email_obj
+
+    @classmethod
+    def enqueue(cls, vouchers: list, user_id) -> dict:
+        """
+        Marks every voucher pending and queues the chunk tasks once the
+        current transaction commits, so workers never mail vouchers that were
+        rolled back. Returns the batch without waiting for any mail to go out.
+        """
+        from celery import group
+
+        from mu_celery.task import deliver_vouchers
+
+        batch = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "total": len(vouchers),
+            "created_at": int(time.time()),
+        }
+        cache.set(cls._key(batch["id"]), batch, timeout=cls.TTL)
+        if not vouchers:
+            return batch
+
+        pipeline = get_redis_connection("default").pipeline()
+        pipeline.hset(
+            f"{cls._key(batch['id'])}:status",
+            mapping={voucher['code']: cls.PENDING for voucher in vouchers},
+        )
+        pipeline.expire(f"{cls._key(batch['id'])}:status", cls.TTL)
+        pipeline.execute()
+
+        chunks = group(
+            deliver_vouchers.s(batch["id"], vouchers[start:start + cls.CHUNK_SIZE])
+            for start in range(0, len(vouchers), cls.CHUNK_SIZE)
+        )
+        transaction.on_commit(chunks.apply_async)
+        return batch
+
+    @classmethod
+    def deliver(cls, batch_id, vouchers: list) -> None:
+        statuses = {}
+        errors = {}
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+            for voucher in vouchers:
+                try:
+                    connection.send_messages([cls.build_message(voucher, connection)])
+                    statuses[voucher['code']] = cls.SENT
+                except Exception as e:
+                    logger.warning(f"Voucher {voucher['code']} was not delivered: {e}")
+                    statuses[voucher['code']] = cls.FAILED
+                    errors[voucher['code']] = str(e)
+        except Exception as e:
+            # the connection itself failed; nothing that was left got sent
+            for voucher in vouchers:
+                if voucher['code'] not in statuses:
+                    statuses[voucher['code']] = cls.FAILED
+                    errors[voucher['code']] = str(e)
+        finally:
+            connection.close()
+
+        pipeline = get_redis_connection("default").pipeline()
+        pipeline.hset(f"{cls._key(batch_id)}:status", mapping=statuses)
+        if errors:
+            pipeline.hset(f"{cls._key(batch_id)}:errors", mapping=errors)
+            pipeline.expire(f"{cls._key(batch_id)}:errors", cls.TTL)
+        pipeline.execute()
+
+    @staticmethod
+    def _decode(hash_: dict) -> dict:
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (
+                value.decode() if isinstance(value, bytes) else value
+            )
+            for key, value in hash_.items()
+        }
+
+    @classmethod
+    def get(cls, batch_id):
+        """
+        Returns the batch with per-voucher status and status counts, or None
+        if it does not exist or has expired.
+        """
+        if not (batch := cache.get(cls._key(batch_id))):
+            return None
+
+        redis = get_redis_connection("default")
+        statuses = cls._decode(redis.hgetall(f"{cls._key(batch_id)}:status"))
+        errors = cls._decode(redis.hgetall(f"{cls._key(batch_id)}:errors"))
+
+        counts = {cls.PENDING: 0, cls.SENT: 0, cls.FAILED: 0}
+        for status in statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return {
+            **batch,
+            "counts": counts,
+            "done": counts[cls.PENDING] == 0,
+            "vouchers": [
+                {"code": code, "status": status, "error": errors.get(code)}
+                for code, status in statuses.items()
+            ],
+        }
@@ -0,0 +1,112 @@
+import uuid
+
+from db.task import TaskList, VoucherLog
+from db.user import User
+from utils.bulk_import import BulkImport
+from utils.karma_voucher import reserve_ordered_ids
+from utils.utils import DateTimeUtils
+from .voucher_delivery import VoucherDelivery
+
+
+class VoucherImport(BulkImport):
+    model = VoucherLog
+    columns = ["muid", "karma", "hashtag", "month", "week", "description", "event"]
+    lookups = {
+        "muid": {
+            "model": User,
+            "field": "muid",
+            "values": ["id", "email", "full_name"],
+            "error": "Invalid muid: {}",
+        },
+        "hashtag": {
+            "model": TaskList,
+            "field": "hashtag",
+            "values": ["id"],
+            "error": "Invalid task hashtag: {}",
+        },
+    }
+
+    def __init__(self, user_id):
+        super().__init__(user_id)
+        self.batch = None
+
+    def clean(self, row):
+        if error := super().clean(row):
+            return error
+
+        karma, week = row["karma"], row["week"]
+        # csv uploads give karma as text; excel gives floats like 5.0
+        try:
+            if float(karma) != int(float(karma)):
+                raise ValueError(karma)
+        except (TypeError, ValueError, OverflowError):
+            return f"Invalid karma: {karma}"
+        if int(float(karma)) == 0:
+            return "Karma cannot be 0"
+        if row["month"] is None:
+            return "Month cannot be empty"
+        if week and len(str(week)) > 2:
+            # a malformed week fails the whole sheet, like the serializer check did
+            self.rejected = True
+            return "Week must not exceed 2 characters in length and should be of the format 'W1'"
+        return None
+
+    def prepare(self, rows) -> None:
+        codes = reserve_ordered_ids(len(rows)) if rows else []
+        for row, code in zip(rows, codes):
+            user = self.ref(row, "muid")
+            row.update(
+                code=code,
+                full_name=user["full_name"],
+                email=user["email"],
+                karma=int(float(row["karma"])),
+                month=str(row["month"]),
+                week=str(row["week"]) if row["week"] else None,
+                description=row["description"] or None,
+                event=row["event"] or None,
+            )
+            row["time_or_event"] = f"{row['month']}/{row['week']}"
+            if row["event"]:
+                row["time_or_event"] = f"{row['event']}/{row['description']}"
+
+    def build(self, row):
+        now = DateTimeUtils.get_current_utc_time()
+        return VoucherLog(
+            id=str(uuid.uuid4()),
+            code=row["code"],
+            user_id=self.ref(row, "muid")["id"],
+            task_id=self.ref(row, "hashtag")["id"],
+            karma=row["karma"],
+            month=row["month"],
+            week=row["week"],
+            claimed=False,
+            event=row["event"],
+            description=row["description"],
+            created_by_id=self.user_id,
+            updated_by_id=self.user_id,
+            created_at=now,
+            updated_at=now,
+        )
+
+    def success(self, row, instance) -> dict:
+        return {
+            'muid': row["muid"],
+            'code': row["code"],
+            'user': row["full_name"],
+            'task': row["hashtag"],
+            'karma': row["karma"],
+            'month': row["month"],
+            'week': row["week"],
+            'description': row["description"],
+            'event': row["event"],
+        }
+
+    def after_create(self, rows, instances) -> None:
+        self.batch = VoucherDelivery.enqueue(
+            [
+                {key: row[key] for key in (
+                    'code', 'full_name', 'email', 'hashtag', 'karma', 'time_or_event')}
+                for row in rows
+            ],
+            self.user_id,
+        )
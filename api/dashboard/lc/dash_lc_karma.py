@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from db.learning_circle import LearningCircle, UserCircleLink
+from db.task import KarmaActivityLog, TaskList
+
+
+class CircleKarma:
+    """
+    Per interest group karma for learning circles and their members.
+
+    One grouped query over the IG's circle links yields every member's IG
+    karma and every circle's total. The result is cached per IG and dropped
+    when approved karma or circle membership in that IG changes.
+    """
+
+    KEY_PREFIX = "lc_circle_karma"
+    TIMEOUT = 60 * 10
+
+    @classmethod
+    def _key(cls, ig_id) -> str:
+        return f"{cls.KEY_PREFIX}:{ig_id}"
+
+    @staticmethod
+    def _compute(ig_id) -> dict:
+        links = (
+            UserCircleLink.objects.filter(circle__ig_id=ig_id)
+            .values("circle_id", "user_id", "accepted")
+            .annotate(
+                karma=Coalesce(
+                    Sum(
+                        "user__karma_activity_log_user__karma",
+                        filter=Q(
+                            user__karma_activity_log_user__task__ig_id=ig_id,
+                            user__karma_activity_log_user__appraiser_approved=True,
+                        ),
+                    ),
+                    0,
+                )
+            )
+            .order_by()
+        )
+
+        members = {}
+        circles = {}
+        for link in links:
+            members[link["user_id"]] = link["karma"]
+            if link["accepted"]:
+                circles[link["circle_id"]] = (
+                    circles.get(link["circle_id"], 0) + link["karma"]
+                )
+
+        return {"members": members, "circles": circles}
+
+    @classmethod
+    def get(cls, ig_id) -> dict:
+        key = cls._key(ig_id)
+        if (karma := cache.get(key)) is None:
+            karma = cls._compute(ig_id)
+            cache.set(key, karma, timeout=cls.TIMEOUT)
+        return karma
+
+    @classmethod
+    def get_member_karma(cls, ig_id, user_id) -> int:
+        return cls.get(ig_id)["members"].get(user_id, 0)
+
+    @classmethod
+    def get_circle_karma(cls, ig_id, circle_id) -> int:
+        return cls.get(ig_id)["circles"].get(circle_id, 0)
+
+    @classmethod
+    def get_circle_rank(cls, ig_id, circle_id) -> int:
+        circles = cls.get(ig_id)["circles"]
+        circle_karma = circles.get(circle_id, 0)
+        return 1 + sum(1 for karma in circles.values() if karma > circle_karma)
+
+    @classmethod
+    def invalidate(cls, ig_id) -> None:
+        if ig_id:
+            cache.delete(cls._key(ig_id))
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_delete, sender=KarmaActivityLog)
+def circle_karma_log_signals(sender, instance, *args, **kwargs):
+    # pending logs do not count towards circle karma, so only approvals and
+    # deletions need to drop the cached totals
+    if instance.appraiser_approved or kwargs.get("signal") == post_delete:
+        CircleKarma.invalidate(
+            TaskList.objects.filter(id=instance.task_id)
+            .values_list("ig_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=UserCircleLink)
+@receiver(post_delete, sender=UserCircleLink)
+def circle_karma_link_signals(sender, instance, *args, **kwargs):
+    CircleKarma.invalidate(
+        LearningCircle.objects.filter(id=instance.circle_id)
+        .values_list("ig_id", flat=True)
+        .first()
+    )
@@ -22,6 +22,7 @@ from utils.types import Lc
 from utils.types import OrganizationType
 from utils.utils import DateTimeUtils
 from .dash_ig_helper import get_today_start_end, get_week_start_end
+from .dash_lc_karma import CircleKarma
 
 
 class LearningCircleSerializer(serializers.ModelSerializer):
@@ -340,15 +341,7 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
         ).exists()
 
     def get_total_karma(self, obj):
-        return (
-            KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=obj,
-                user__user_circle_link_user__accepted=True,
-                task__ig=obj.ig,
-                appraiser_approved=True,
-            ).aggregate(total_karma=Sum("karma"))["total_karma"]
-            or 0
-        )
+        return CircleKarma.get_circle_karma(obj.ig_id, obj.id)
 
     def get_members(self, obj):
         return self._get_member_info(obj, accepted=1)
@@ -358,17 +351,14 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
 
     def _get_member_info(self, obj, accepted):
 
-        members = obj.user_circle_link_circle.filter(circle=obj, accepted=accepted)
+        members = obj.user_circle_link_circle.filter(
+            circle=obj, accepted=accepted
+        ).select_related("user", "user__user_lvl_link_user__level")
 
         member_info = []
 
         for member in members:
-            total_ig_karma = (
-                KarmaActivityLog.objects.filter(
-                    task__ig=member.circle.ig, user=member.user, appraiser_approved=True
-                ).aggregate(total_karma=Sum("karma"))["total_karma"]
-                or 0
-            )
+            total_ig_karma = CircleKarma.get_member_karma(obj.ig_id, member.user_id)
 
             member_info.append(
                 {
@@ -384,47 +374,7 @@ class LearningCircleDetailsSerializer(serializers.ModelSerializer):
         return member_info
 
     def get_rank(self, obj):
-        total_karma = (
-            KarmaActivityLog.objects.filter(
-                user__user_circle_link_user__circle=obj,
-                user__user_circle_link_user__accepted=True,
-                task__ig=obj.ig,
-                appraiser_approved=True,
-            ).aggregate(total_karma=Sum("karma"))["total_karma"]
-            or 0
-        )
-
-        circle_ranks = {obj.name: {"total_karma": total_karma}}
-
-        all_learning_circles = LearningCircle.objects.filter(ig=obj.ig).exclude(
-            id=obj.id
-        )
-
-        for lc in all_learning_circles:
-            total_karma_lc = (
-                KarmaActivityLog.objects.filter(
-                    user__user_circle_link_user__circle=lc,
-                    user__user_circle_link_user__accepted=True,
-                    task__ig=lc.ig,
-                    appraiser_approved=True,
-                ).aggregate(total_karma=Sum("karma"))["total_karma"]
-                or 0
-            )
-
-            circle_ranks[lc.name] = {"total_karma": total_karma_lc}
-
-        sorted_ranks = sorted(
-            circle_ranks.items(), key=lambda x: x[1]["total_karma"], reverse=True
-        )
-
-        return next(
-            (
-                i + 1
-                for i, (circle_name, data) in enumerate(sorted_ranks)
-                if circle_name == obj.name
-            ),
-            None,
-        )
+        return CircleKarma.get_circle_rank(obj.ig_id, obj.id)
 
     def get_previous_meetings(self, obj):
         return (
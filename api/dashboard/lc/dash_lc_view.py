@@ -21,6 +21,7 @@ from utils.response import CustomResponse
 from utils.types import Lc, RoleType
 from utils.utils import DateTimeUtils, send_template_mail
 from utils.permission import CustomizePermission, JWTUtils, role_required
+from utils.search import SearchIndex
 from .dash_ig_helper import (
     get_today_start_end,
     get_week_start_end,
@@ -197,14 +198,17 @@ class TotalLearningCircleListApi(APIView):
             filters &= Q(ig_id=interest_group_id)
 
         if circle_code:
-            if not LearningCircle.objects.filter(
-                Q(circle_code=circle_code) | Q(name__icontains=circle_code)
-            ).exists():
+            if (keys := SearchIndex.search("learning_circle", circle_code)) is not None:
+                name_filter = Q(circle_code=circle_code) | Q(pk__in=keys)
+            else:
+                name_filter = Q(circle_code=circle_code) | Q(name__icontains=circle_code)
+
+            if not LearningCircle.objects.filter(name_filter).exists():
                 return CustomResponse(
                     general_message="invalid circle code or Circle Name"
                 ).get_failure_response()
 
-            filters &= Q(circle_code=circle_code) | Q(name__icontains=circle_code)
+            filters &= name_filter
 
         learning_queryset = LearningCircle.objects.filter(filters)
 
@@ -0,0 +1,68 @@
+import uuid
+
+from django.db import transaction
+
+from db.organization import District, OrgAffiliation, Organization
+from utils.bulk_import import BulkImport
+from utils.search import SearchIndex
+from utils.types import OrganizationType
+
+
+class OrganisationImport(BulkImport):
+    model = Organization
+    columns = ["title", "code", "org_type", "affiliation", "district"]
+    required = ["title", "code"]
+    max_lengths = {"title": 100, "code": 12}
+    lookups = {
+        "affiliation": {
+            "model": OrgAffiliation,
+            "field": "title",
+            "values": ["id"],
+            "error": "Invalid affiliation: {}",
+            "optional": True,
+        },
+        "district": {
+            "model": District,
+            "field": "name",
+            "values": ["id"],
+            "error": "Invalid district: {}",
+        },
+    }
+    unique = {
+        "title": {
+            "columns": ("title",),
+            "duplicate": "Duplicate title in excel: {}",
+            "exists": "Duplicate title in database: {}",
+        },
+        "code": {
+            "columns": ("code",),
+            "duplicate": "Duplicate code in excel: {}",
+            "exists": "Duplicate code in database: {}",
+        },
+    }
+
+    def clean(self, row):
+        if error := super().clean(row):
+            return error
+        if row["org_type"] not in OrganizationType.get_all_values():
+            return f"Invalid org_type: {row['org_type']}"
+        return None
+
+    def build(self, row):
+        affiliation = self.ref(row, "affiliation")
+        return Organization(
+            id=str(uuid.uuid4()),
+            title=row["title"],
+            code=row["code"],
+            org_type=row["org_type"],
+            affiliation_id=affiliation["id"] if affiliation else None,
+            district_id=self.ref(row, "district")["id"],
+            created_by_id=self.user_id,
+            updated_by_id=self.user_id,
+        )
+
+    def after_create(self, rows, instances) -> None:
+        # bulk_create skips the post_save receivers; landing stats are
+        # reconciled by their periodic task
+        pks = [instance.id for instance in instances]
+        transaction.on_commit(lambda: SearchIndex.reindex_many("organization", pks))
@@ -1,4 +1,3 @@
-import uuid
 from io import BytesIO
 from tempfile import NamedTemporaryFile
 
@@ -15,6 +14,7 @@ from db.organization import (
 )
 from db.user import User
 
+from utils.exception import CustomException
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import OrganizationType, RoleType, WebHookActions, WebHookCategory
@@ -29,8 +29,8 @@ from .serializers import (
     OrganizationMergerSerializer,
     OrganizationKarmaTypeGetPostPatchDeleteSerializer,
     OrganizationKarmaLogGetPostPatchDeleteSerializer,
-    OrganizationImportSerializer,
 )
+from .organisation_import import OrganisationImport
 
 
 class InstitutionPostUpdateDeleteAPI(APIView):
@@ -185,6 +185,7 @@ class InstitutionAPI(APIView):
                 "state": "district__zone__state__name",
                 "country": "district__zone__state__country__name",
             },
+            search_index="organization",
         )
 
         serializer = InstitutionSerializer(
@@ -223,9 +224,9 @@ class InstitutionCSVAPI(APIView):
             )
         )
 
-        serializer = InstitutionSerializer(organizations, many=True).data
-
-        return CommonUtils.generate_csv(serializer, f"{org_type} data")
+        return CommonUtils.generate_csv(
+            organizations, f"{org_type} data", InstitutionSerializer
+        )
 
 
 class InstitutionDetailsAPI(APIView):
@@ -562,142 +563,27 @@ class OrganisationImportAPI(APIView):
                 general_message="File not found."
             ).get_failure_response()
 
-        excel_data = ImportCSV()
-        excel_data = excel_data.read_excel_file(file_obj)
+        headers, rows = ImportCSV().read_rows(file_obj)
 
-        if not excel_data:
+        if not headers:
             return CustomResponse(
                 general_message="Empty csv file."
             ).get_failure_response()
 
-        temp_headers = ["title", "code", "org_type", "affiliation", "district"]
-        first_entry = excel_data[0]
-        for key in temp_headers:
-            if key not in first_entry:
-                return CustomResponse(
-                    general_message=f"{key} does not exist in the file."
-                ).get_failure_response()
-
-        excel_data = [row for row in excel_data if any(row.values())]
-        valid_rows = []
-        error_rows = []
-
-        title_excel = set()
-        code_excel = set()
-        title_db = Organization.objects.values_list("title", flat=True)
-        code_db = Organization.objects.values_list("code", flat=True)
-
-        affiliations_to_fetch = set()
-        districts_to_fetch = set()
-
-        for row in excel_data[1:]:
-            title = row.get("title")
-            if not title:
-                row["error"] = "Missing title."
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif title in title_excel:
-                row["error"] = f"Duplicate title in excel: {title}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif title in title_db:
-                row["error"] = f"Duplicate title in database: {title}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            else:
-                title_excel.add(title)
-
-            code = row.get("code")
-            if not code:
-                row["error"] = "Missing code."
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif code in code_excel:
-                row["error"] = f"Duplicate code in excel: {code}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            elif code in code_db:
-                row["error"] = f"Duplicate code in database: {code}"
-                error_rows.append(row)
-                excel_data.remove(row)
-                continue
-            else:
-                code_excel.add(code)
-
-            affiliation = row.get("affiliation")
-            district = row.get("district")
-
-            affiliations_to_fetch.add(affiliation)
-            districts_to_fetch.add(district)
-
-        affiliations = OrgAffiliation.objects.filter(
-            title__in=affiliations_to_fetch
-        ).values("id", "title")
-
-        districts = District.objects.filter(name__in=districts_to_fetch).values(
-            "id", "name"
-        )
-
-        affiliations_dict = {
-            affiliation["title"]: affiliation["id"] for affiliation in affiliations
-        }
-        districts_dict = {district["name"]: district["id"] for district in districts}
-        org_types = OrganizationType.get_all_values()
-
-        for row in excel_data[1:]:
-            affiliation = row.pop("affiliation")
-            district = row.pop("district")
+        organisation_import = OrganisationImport(JWTUtils.fetch_user_id(request))
+        if missing := organisation_import.missing_columns(headers):
+            return CustomResponse(
+                general_message=f"{missing[0]} does not exist in the file."
+            ).get_failure_response()
 
-            affiliation_id = (
-                affiliations_dict.get(affiliation) if affiliation is not None else None
-            )
-            district_id = districts_dict.get(district)
-            org_type = row.get("org_type")
-
-            if affiliation and not affiliation_id:
-                row["error"] = f"Invalid affiliation: {affiliation}"
-                error_rows.append(row)
-            elif not district_id:
-                row["error"] = f"Invalid district: {district}"
-                error_rows.append(row)
-            elif org_type not in org_types:
-                row["error"] = f"Invalid org_type: {org_type}"
-                error_rows.append(row)
-            else:
-                user_id = JWTUtils.fetch_user_id(request)
-                row["id"] = str(uuid.uuid4())
-                row["updated_by_id"] = user_id
-                row["created_by_id"] = user_id
-                row["affiliation_id"] = affiliation_id
-                row["district_id"] = district_id
-                valid_rows.append(row)
-
-        organization_list_serializer = OrganizationImportSerializer(
-            data=valid_rows, many=True
-        )
-        success_data = []
-        if organization_list_serializer.is_valid():
-            organization_list_serializer.save()
-            for organization_data in organization_list_serializer.data:
-                success_data.append(
-                    {
-                        "title": organization_data.get("title", ""),
-                        "code": organization_data.get("code", ""),
-                        "org_type": organization_data.get("org_type", ""),
-                        "affiliation": organization_data.get("affiliation_id", ""),
-                        "district": organization_data.get("district_id", ""),
-                    }
-                )
-        else:
-            error_rows.append(organization_list_serializer.errors)
+        dry_run = request.query_params.get("dry_run") == "true"
+        try:
+            result = organisation_import.run(rows, dry_run=dry_run)
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
 
         return CustomResponse(
-            response={"Success": success_data, "Failed": error_rows}
+            response={**result, "dry_run": dry_run}
         ).get_success_response()
 
 
@@ -401,30 +401,3 @@ class OrganizationKarmaLogGetPostPatchDeleteSerializer(serializers.ModelSerializ
 
         return OrgKarmaLog.objects.create(**validated_data)
 
-
-class OrganizationImportSerializer(serializers.ModelSerializer):
-    created_by_id = serializers.CharField(required=True, allow_null=False)
-    updated_by_id = serializers.CharField(required=True, allow_null=False)
-    affiliation_id = serializers.CharField(required=False, allow_null=True)
-    district_id = serializers.CharField(required=False, allow_null=True)
-
-    class Meta:
-        model = Organization
-        fields = [
-            "id",
-            "title",
-            "code",
-            "org_type",
-            "affiliation_id",
-            "district_id",
-            "created_by_id",
-            "updated_by_id",
-        ]
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-
-        representation['affiliation_id'] = instance.affiliation.title if instance.affiliation else None
-        representation['district_id'] = instance.district.name if instance.district else None
-
-        return representation
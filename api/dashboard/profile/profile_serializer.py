@@ -2,7 +2,7 @@ import uuid
 
 from decouple import config as decouple_config
 from django.db import transaction
-from django.db.models import F, Sum, Q
+from django.db.models import F, Sum
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
@@ -19,6 +19,7 @@ from db.task import (
 from db.user import User, UserSettings, Socials
 from utils.exception import CustomException
 from utils.permission import JWTUtils
+from utils.rank_index import KarmaRankIndex
 from utils.types import (
     OrganizationType,
     RoleType,
@@ -100,15 +101,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         )
 
     def get_percentile(self, obj):
-        users_count_lt_user_karma = Wallet.objects.filter(
-            karma__lt=obj.wallet_user.karma
-        ).count()
-        user_count = User.objects.all().count()
-        return (
-            0
-            if user_count == 0
-            else 100 - ((users_count_lt_user_karma * 100) / user_count)
-        )
+        return KarmaRankIndex.get_percentile(obj.wallet_user.karma)
 
     def get_roles(self, obj):
         if "role_values" in self.context:
@@ -140,34 +133,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     def get_rank(self, obj):
         roles = self.get_roles(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by("-karma", "-updated_at", "created_at")
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by("-karma", "-updated_at", "created_at")
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(
-                        user__user_role_link_user__role__title__in=[
-                            RoleType.ENABLER.value,
-                            RoleType.MENTOR.value,
-                        ]
-                    )
-                )
-                .order_by("-karma", "-updated_at", "created_at")
-            )
-        ranks = list(ranks.values_list("user_id", flat=True))
-        return ranks.index(obj.id) + 1
+        return KarmaRankIndex.get_rank(KarmaRankIndex.cohort_for_roles(roles), obj.id)
 
     def get_karma_distribution(self, obj):
         return (
@@ -260,35 +226,7 @@ class UserRankSerializer(ModelSerializer):
 
     def get_rank(self, obj):
         roles = self.get_role(obj)
-        user_karma = obj.wallet_user.karma
-        if RoleType.MENTOR.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.MENTOR.value,
-                karma__gte=user_karma,
-            ).order_by("-karma", "-updated_at", "created_at")
-        elif RoleType.ENABLER.value in roles:
-            ranks = Wallet.objects.filter(
-                user__user_role_link_user__verified=True,
-                user__user_role_link_user__role__title=RoleType.ENABLER.value,
-                karma__gte=user_karma,
-            ).order_by("-karma", "-updated_at", "created_at")
-        else:
-            ranks = (
-                Wallet.objects.filter(karma__gte=user_karma)
-                .exclude(
-                    Q(
-                        user__user_role_link_user__role__title__in=[
-                            RoleType.ENABLER.value,
-                            RoleType.MENTOR.value,
-                        ]
-                    )
-                )
-                .order_by("-karma", "-updated_at", "created_at")
-            )
-
-        ranks = list(ranks.values_list("user_id", flat=True))
-        return ranks.index(obj.id) + 1
+        return KarmaRankIndex.get_rank(KarmaRankIndex.cohort_for_roles(roles), obj.id)
 
     def get_karma(self, obj):
         return total_karma.karma if (total_karma := obj.wallet_user) else None
@@ -458,6 +396,8 @@ class LinkSocials(ModelSerializer):
                 Wallet.objects.filter(user_id=user_id).update(
                     karma=F("karma") + karma_value, updated_by_id=user_id
                 )
+                # queryset updates skip post_save, so move the rank index by hand
+                KarmaRankIndex.update_user(user_id)
 
         for account, account_url in validated_data.items():
             old_account_url = getattr(instance, account)
@@ -0,0 +1,77 @@
+import uuid
+
+from django.db import transaction
+
+from db.user import Role, User, UserRoleLink
+from utils.bulk_import import BulkImport
+from utils.rank_index import KarmaRankIndex
+from utils.types import WebHookActions, WebHookCategory
+from utils.utils import DateTimeUtils, DiscordWebhooks
+
+
+class UserRoleImport(BulkImport):
+    model = UserRoleLink
+    columns = ["muid", "role"]
+    lookups = {
+        "muid": {
+            "model": User,
+            "field": "muid",
+            "values": ["id", "full_name"],
+            "error": "Invalid user muid: {}",
+        },
+        "role": {
+            "model": Role,
+            "field": "title",
+            "values": ["id"],
+            "error": "Invalid role: {}",
+        },
+    }
+    unique = {
+        "user_role": {
+            "columns": ("muid", "role"),
+            "duplicate": "Duplicate entry",
+            "exists": "User {} already has role {}",
+        },
+    }
+
+    def existing_keys(self, name: str, keys: set) -> set:
+        return set(
+            UserRoleLink.objects.filter(
+                user_id__in=[user["id"] for user in self.refs["muid"].values()],
+                role_id__in=[role["id"] for role in self.refs["role"].values()],
+            ).values_list("user__muid", "role__title")
+        )
+
+    def build(self, row):
+        return UserRoleLink(
+            id=str(uuid.uuid4()),
+            user_id=self.ref(row, "muid")["id"],
+            role_id=self.ref(row, "role")["id"],
+            verified=True,
+            created_by_id=self.user_id,
+            created_at=DateTimeUtils.get_current_utc_time(),
+        )
+
+    def success(self, row, instance) -> dict:
+        return {"user": self.ref(row, "muid")["full_name"], "role": row["role"]}
+
+    def after_create(self, rows, instances) -> None:
+        # bulk_create skips the post_save receivers: the karma rank cohorts
+        # are updated here and landing stats by their periodic task
+        users_by_role = {}
+        for row in rows:
+            users_by_role.setdefault(row["role"], []).append(self.ref(row, "muid")["id"])
+
+        def after_commit():
+            for user_id in {user_id for ids in users_by_role.values() for user_id in ids}:
+                KarmaRankIndex.update_user(user_id)
+
+            for role, user_ids in users_by_role.items():
+                DiscordWebhooks.general_updates(
+                    WebHookCategory.BULK_ROLE.value,
+                    WebHookActions.UPDATE.value,
+                    role,
+                    ",".join(user_ids),
+                )
+
+        transaction.on_commit(after_commit)
@@ -0,0 +1,134 @@
+import uuid
+
+from django.db import transaction
+
+from db.organization import Organization
+from db.task import Channel, InterestGroup, Level, TaskList, TaskType
+from utils.bulk_import import BulkImport
+from utils.search import SearchIndex
+from utils.types import Events
+from utils.utils import DateTimeUtils
+
+
+class TaskImport(BulkImport):
+    model = TaskList
+    columns = [
+        "hashtag",
+        "title",
+        "description",
+        "karma",
+        "usage_count",
+        "variable_karma",
+        "level",
+        "channel",
+        "type",
+        "ig",
+        "org",
+        "event",
+    ]
+    required = ["hashtag", "title"]
+    max_lengths = {"hashtag": 75, "title": 75, "description": 200}
+    lookups = {
+        "channel": {
+            "model": Channel,
+            "field": "name",
+            "values": ["id"],
+            "error": "Invalid channel: {}",
+            "optional": True,
+        },
+        "type": {
+            "model": TaskType,
+            "field": "title",
+            "values": ["id"],
+            "error": "Invalid task type: {}",
+        },
+        "level": {
+            "model": Level,
+            "field": "name",
+            "values": ["id"],
+            "error": "Invalid level: {}",
+            "optional": True,
+        },
+        "ig": {
+            "model": InterestGroup,
+            "field": "name",
+            "values": ["id"],
+            "error": "Invalid interest group: {}",
+            "optional": True,
+        },
+        "org": {
+            "model": Organization,
+            "field": "code",
+            "values": ["id"],
+            "error": "Invalid organization: {}",
+            "optional": True,
+        },
+    }
+    unique = {
+        "hashtag": {
+            "columns": ("hashtag",),
+            "duplicate": "Duplicate hashtag in excel: {}",
+            "exists": "Duplicate hashtag in database: {}",
+        },
+    }
+
+    @staticmethod
+    def _int(value):
+        if value in (None, ""):
+            return None
+        if float(value) != int(float(value)):
+            raise ValueError(value)
+        return int(float(value))
+
+    @staticmethod
+    def _bool(value) -> bool:
+        return str(value).strip().lower() in ("true", "1", "yes")
+
+    def clean(self, row):
+        if error := super().clean(row):
+            return error
+        if row["event"] is not None and row["event"] not in Events.get_all_values():
+            return f"Invalid event: {row['event']}"
+        for column in ("karma", "usage_count"):
+            try:
+                self._int(row[column])
+            except (TypeError, ValueError):
+                return f"Invalid {column}: {row[column]}"
+        return None
+
+    def prepare(self, rows) -> None:
+        for row in rows:
+            row["karma"] = self._int(row["karma"])
+            row["usage_count"] = self._int(row["usage_count"])
+            row["variable_karma"] = self._bool(row["variable_karma"])
+
+    def _ref_id(self, row, column):
+        ref = self.ref(row, column)
+        return ref["id"] if ref else None
+
+    def build(self, row):
+        now = DateTimeUtils.get_current_utc_time()
+        return TaskList(
+            id=str(uuid.uuid4()),
+            hashtag=row["hashtag"],
+            title=row["title"],
+            description=row["description"],
+            karma=row["karma"],
+            usage_count=1 if row["usage_count"] is None else row["usage_count"],
+            variable_karma=row["variable_karma"],
+            channel_id=self._ref_id(row, "channel"),
+            type_id=self._ref_id(row, "type"),
+            level_id=self._ref_id(row, "level"),
+            ig_id=self._ref_id(row, "ig"),
+            org_id=self._ref_id(row, "org"),
+            event=row["event"],
+            active=True,
+            created_by_id=self.user_id,
+            updated_by_id=self.user_id,
+            created_at=now,
+            updated_at=now,
+        )
+
+    def after_create(self, rows, instances) -> None:
+        pks = [instance.id for instance in instances]
+        transaction.on_commit(lambda: SearchIndex.reindex_many("task", pks))
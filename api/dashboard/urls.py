@@ -27,4 +27,6 @@ urlpatterns = [
     path('coupon/', include('api.dashboard.coupon.urls')),
 
     path('projects/', include('api.dashboard.projects.urls')),
+
+    path('export/', include('api.dashboard.export.urls')),
 ]
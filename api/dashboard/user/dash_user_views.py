@@ -9,6 +9,7 @@ from rest_framework.views import APIView
 
 from db.organization import UserOrganizationLink
 from db.user import ForgotPassword, User, UserRoleLink
+from utils.exception import CustomException
 from utils.permission import CustomizePermission, JWTUtils, role_required
 from utils.response import CustomResponse
 from utils.types import OrganizationType, RoleType, WebHookActions, WebHookCategory
@@ -95,22 +96,28 @@ class UserAPI(APIView):
             "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
         ).all()
 
-        queryset = CommonUtils.get_paginated_queryset(
-            user_queryset,
-            request,
-            [
-                "muid",
-                "full_name",
-                "email",
-                "mobile",
-                "user_lvl_link_user__level__name",
-            ],
-            {
-                "full_name": "full_name",
-                "karma": "wallet_user__karma",
-                "created_at": "created_at",
-            },
-        )
+        try:
+            queryset = CommonUtils.get_paginated_queryset(
+                user_queryset,
+                request,
+                [
+                    "muid",
+                    "full_name",
+                    "email",
+                    "mobile",
+                    "user_lvl_link_user__level__name",
+                ],
+                {
+                    "full_name": "full_name",
+                    "karma": "wallet_user__karma",
+                    "created_at": "created_at",
+                },
+                allow_cursor=True,
+                count_mode="cached",
+                search_index="user",
+            )
+        except CustomException as e:
+            return CustomResponse(general_message=str(e)).get_failure_response()
         serializer = dash_user_serializer.UserDashboardSerializer(
             queryset.get("queryset"), many=True
         )
@@ -129,12 +136,10 @@ class UserManagementCSV(APIView):
             "wallet_user", "user_lvl_link_user", "user_lvl_link_user__level"
         ).all()
 
-        serializer = dash_user_serializer.UserDashboardSerializer(
-            user_queryset, many=True
+        return CommonUtils.generate_csv(
+            user_queryset, "User", dash_user_serializer.UserDashboardSerializer
         )
 
-        return CommonUtils.generate_csv(serializer.data, "User")
-
 
 class UserVerificationAPI(APIView):
     authentication_classes = [CustomizePermission]
@@ -222,10 +227,9 @@ class UserVerificationCSV(APIView):
             verified=False
         )
 
-        serializer = dash_user_serializer.UserVerificationSerializer(
-            user_queryset, many=True
+        return CommonUtils.generate_csv(
+            user_queryset, "User", dash_user_serializer.UserVerificationSerializer
         )
-        return CommonUtils.generate_csv(serializer.data, "User")
 
 
 class ForgotPasswordAPI(APIView):
@@ -185,10 +185,12 @@ class ZonalStudentDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_zonal_serializer.ZonalStudentDetailsSerializer(
-            user_org_links, many=True, context={"ranks": ranks}
+        return CommonUtils.generate_csv(
+            user_org_links,
+            "Zonal Student Details",
+            dash_zonal_serializer.ZonalStudentDetailsSerializer,
+            context={"ranks": ranks},
         )
-        return CommonUtils.generate_csv(serializer.data, "Zonal Student Details")
 
 
 class ZonalCollegeDetailsAPI(APIView):
@@ -294,7 +296,9 @@ class ZonalCollegeDetailsCSVAPI(APIView):
             )
         )
 
-        serializer = dash_zonal_serializer.ZonalCollegeDetailsSerializer(
-            organizations, many=True, context={"leads": leads}
+        return CommonUtils.generate_csv(
+            organizations,
+            "Zonal College Details",
+            dash_zonal_serializer.ZonalCollegeDetailsSerializer,
+            context={"leads": leads},
         )
-        return CommonUtils.generate_csv(serializer.data, "Zonal College Details")
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from db.organization import Organization, UserOrganizationLink
+from db.task import KarmaActivityLog, Wallet
+from db.user import User
+from utils.response import CustomResponse
+from utils.types import OrganizationType, RoleType
+from utils.utils import DateTimeUtils
+
+from . import serializers
+
+
+class LeaderboardSnapshot:
+    """
+    Precomputed public leaderboards.
+
+    Each board is ranked once per refresh and stored in the cache as a
+    zlib-compressed column/row payload tagged with a content hash. Reads are a
+    single cache lookup and the hash doubles as the response ETag.
+
+    A snapshot older than twice the refresh interval is stale. One reader
+    takes a lock and rebuilds it while the others keep serving the stale
+    copy, which is kept for KEEP_SECONDS; with no copy at all they get a 503
+    with Retry-After straight away instead of all ranking the board at once.
+    """
+
+    KEY_PREFIX = "leaderboard_snapshot"
+    SIZE = 20
+    REFRESH_SECONDS = settings.LEADERBOARD_SNAPSHOT_REFRESH_SECONDS
+    REFRESH_DEBOUNCE_SECONDS = 60
+    KEEP_SECONDS = 60 * 60 * 24
+    REBUILD_LOCK_SECONDS = 30
+    REBUILD_RETRY_AFTER_SECONDS = 5
+
+    STUDENTS = "students"
+    STUDENTS_MONTHLY = "students-monthly"
+    COLLEGE = "college"
+    COLLEGE_MONTHLY = "college-monthly"
+
+    @staticmethod
+    def _students():
+        students_leaderboard = (
+            User.objects.filter(
+                user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+                user_role_link_user__role__title=RoleType.STUDENT.value,
+                exist_in_guild=True,
+            )
+            .distinct()
+            .select_related("wallet_user")
+            .prefetch_related(
+                Prefetch(
+                    "user_organization_link_user",
+                    queryset=UserOrganizationLink.objects.filter(
+                        org__org_type=OrganizationType.COLLEGE.value
+                    ).select_related("org"),
+                    to_attr="colleges",
+                )
+            )
+            .order_by("-wallet_user__karma")[: LeaderboardSnapshot.SIZE]
+        )
+        return serializers.StudentLeaderboardSerializer(
+            students_leaderboard, many=True
+        ).data
+
+    @staticmethod
+    def _students_monthly():
+        start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
+        return (
+            User.objects.filter(
+                user_role_link_user__role__title=RoleType.STUDENT.value,
+                user_organization_link_user__org__org_type=OrganizationType.COLLEGE.value,
+                exist_in_guild=True,
+            )
+            .annotate(
+                full_name=F("full_name"),
+                institution=F("user_organization_link_user__org__title"),
+                total_karma=Coalesce(
+                    Sum(
+                        "karma_activity_log_user__karma",
+                        filter=Q(
+                            karma_activity_log_user__created_at__range=(
+                                start_date,
+                                end_date,
+                            )
+                        ),
+                    ),
+                    Value(0),
+                ),
+            )
+            .values(
+                "full_name",
+                "total_karma",
+                "institution",
+            )
+            .order_by("-total_karma")[: LeaderboardSnapshot.SIZE]
+        )
+
+    @staticmethod
+    def _college():
+        return (
+            Organization.objects.filter(
+                org_type=OrganizationType.COLLEGE.value,
+                user_organization_link_org__user__user_role_link_user__role__title=RoleType.STUDENT.value,
+                user_organization_link_org__user__exist_in_guild=True,
+            )
+            .distinct()
+            .annotate(
+                total_students=Count("user_organization_link_org__user"),
+                total_karma=Sum("user_organization_link_org__user__wallet_user__karma"),
+            )
+            .values("code", "title", "total_students", "total_karma")
+            .order_by("-total_karma")[: LeaderboardSnapshot.SIZE]
+        )
+
+    @staticmethod
+    def _college_monthly():
+        start_date, end_date = DateTimeUtils.get_start_and_end_of_previous_month()
+        return (
+            Organization.objects.filter(
+                org_type=OrganizationType.COLLEGE.value,
+                user_organization_link_org__user__karma_activity_log_user__created_at__range=(
+                    start_date,
+                    end_date,
+                ),
+                user_organization_link_org__user__karma_activity_log_user__appraiser_approved=True,
+            )
+            .annotate(
+                total_karma=Coalesce(
+                    Sum(
+                        "user_organization_link_org__user__karma_activity_log_user__karma",
+                        filter=Q(
+                            user_organization_link_org__user__karma_activity_log_user__created_at__range=(
+                                start_date,
+                                end_date,
+                            )
+                        ),
+                    ),
+                    Value(0),
+                ),
+                students=Count("user_organization_link_org__user", distinct=True),
+                institution=F("title"),
+            )
+            .values("code", "total_karma", "students")
+            .order_by("-total_karma")[: LeaderboardSnapshot.SIZE]
+        )
+
+    @classmethod
+    def _boards(cls):
+        return {
+            cls.STUDENTS: (cls._students, False),
+            cls.STUDENTS_MONTHLY: (cls._students_monthly, True),
+            cls.COLLEGE: (cls._college, False),
+            cls.COLLEGE_MONTHLY: (cls._college_monthly, True),
+        }
+
+    @classmethod
+    def _key(cls, board: str) -> str:
+        _, is_monthly = cls._boards()[board]
+        if not is_monthly:
+            return f"{cls.KEY_PREFIX}:{board}:all"
+        start_date, _ = DateTimeUtils.get_start_and_end_of_previous_month()
+        return f"{cls.KEY_PREFIX}:{board}:{start_date:%Y-%m}"
+
+    @classmethod
+    def refresh(cls, board: str) -> dict:
+        build, _ = cls._boards()[board]
+        rows = list(build())
+        fields = list(rows[0].keys()) if rows else []
+        serialized = json.dumps(
+            {"fields": fields, "rows": [[row[field] for field in fields] for row in rows]},
+            separators=(",", ":"),
+            default=str,
+        ).encode()
+
+        snapshot = {
+            "version": hashlib.sha1(serialized).hexdigest()[:16],
+            "blob": zlib.compress(serialized),
+            "refreshed_at": time.time(),
+        }
+        cache.set(cls._key(board), snapshot, timeout=cls.KEEP_SECONDS)
+        return snapshot
+
+    @classmethod
+    def refresh_all(cls) -> None:
+        for board in cls._boards():
+            cls.refresh(board)
+
+    @classmethod
+    def schedule_refresh(cls) -> None:
+        """
+        Coalesces karma changes into one delayed refresh per debounce window.
+        """
+        if not cache.add(
+            f"{cls.KEY_PREFIX}:refresh_pending",
+            True,
+            timeout=cls.REFRESH_DEBOUNCE_SECONDS,
+        ):
+            return
+
+        from mu_celery.task import refresh_leaderboard_snapshots
+
+        transaction.on_commit(
+            lambda: refresh_leaderboard_snapshots.apply_async(
+                countdown=cls.REFRESH_DEBOUNCE_SECONDS
+            )
+        )
+
+    @classmethod
+    def _rebuild(cls, board: str, stale):
+        lock_key = f"{cls._key(board)}:rebuilding"
+        if cache.add(lock_key, True, timeout=cls.REBUILD_LOCK_SECONDS):
+            try:
+                return cls.refresh(board)
+            finally:
+                cache.delete(lock_key)
+
+        return stale
+
+    @classmethod
+    def get(cls, board: str):
+        snapshot = cache.get(cls._key(board))
+        if (
+            snapshot is None
+            or time.time() - snapshot.get("refreshed_at", 0) > cls.REFRESH_SECONDS * 2
+        ):
+            snapshot = cls._rebuild(board, snapshot)
+        if snapshot is None:
+            return None, None
+        payload = json.loads(zlib.decompress(snapshot["blob"]))
+        data = [dict(zip(payload["fields"], row)) for row in payload["rows"]]
+        return snapshot["version"], data
+
+    @classmethod
+    def get_response(cls, request, board: str) -> Response:
+        version, data = cls.get(board)
+        if version is None:
+            response = CustomResponse(
+                general_message="Leaderboard is being refreshed. Please try again shortly."
+            ).get_failure_response(
+                status_code=503,
+                http_status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = str(cls.REBUILD_RETRY_AFTER_SECONDS)
+            return response
+
+        etag = f'"{version}"'
+
+        if request.headers.get("If-None-Match") == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = CustomResponse(response=data).get_success_response()
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, no-cache"
+        return response
+
+
+@receiver(post_save, sender=KarmaActivityLog)
+@receiver(post_save, sender=Wallet)
+def leaderboard_snapshot_signals(sender, instance, *args, **kwargs):
+    LeaderboardSnapshot.schedule_refresh()
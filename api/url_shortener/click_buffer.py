@@ -0,0 +1,248 @@
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, DataError, IntegrityError
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from db.url_shortener import UrlShortener, UrlShortenerTracker
+from utils.utils import _CustomHTTPHandler
+
+logger = logging.getLogger(__name__)
+
+
+class ClickBuffer:
+    """
+    Buffers short URL clicks in a Redis list and batch-inserts them.
+
+    A click is one RPUSH; a flush is scheduled FLUSH_MS after the first
+    buffered click, or right away once BATCH_SIZE clicks are waiting, and a
+    periodic flush acts as a safety net. When Redis is unavailable, or
+    MAX_PENDING clicks are already queued, the click is inserted directly so
+    the caller absorbs the back-pressure instead of the buffer growing
+    without bound.
+
+    A batch that fails to insert is retried row by row. Clicks for short
+    URLs deleted in the meantime are dropped, rows the database rejects go
+    to a capped dead-letter list, and rows that failed for a transient
+    reason are requeued at the tail, at most MAX_ATTEMPTS times, so no row
+    can block the ones behind it.
+    """
+
+    KEY = "url_click_buffer"
+    DEAD_KEY = "url_click_buffer:dead"
+    FLUSH_PENDING_KEY = "url_click_buffer:flush_pending"
+    IMMEDIATE_FLUSH_KEY = "url_click_buffer:immediate_flush_pending"
+    IMMEDIATE_FLUSH_TIMEOUT = 10
+    MAX_ATTEMPTS = 5
+    DEAD_LIMIT = 10000
+    FLUSH_MS = settings.URL_CLICK_FLUSH_MS
+    BATCH_SIZE = settings.URL_CLICK_BATCH_SIZE
+    MAX_PENDING = settings.URL_CLICK_MAX_PENDING
+
+    FIELDS = (
+        "ip_address",
+        "browser",
+        "operating_system",
+        "version",
+        "device_type",
+        "city",
+        "region",
+        "country",
+        "location",
+        "referrer",
+    )
+
+    # first matching token wins, so more specific tokens come first
+    BROWSERS = (
+        ("Edg", "Edge"),
+        ("OPR", "Opera"),
+        ("SamsungBrowser", "Samsung Internet"),
+        ("Chrome", "Chrome"),
+        ("CriOS", "Chrome"),
+        ("Firefox", "Firefox"),
+        ("FxiOS", "Firefox"),
+        ("Safari", "Safari"),
+    )
+    OPERATING_SYSTEMS = (
+        ("Android", "Android"),
+        ("iPhone", "iOS"),
+        ("iPad", "iOS"),
+        ("Windows", "Windows"),
+        ("Mac OS X", "macOS"),
+        ("CrOS", "Chrome OS"),
+        ("Linux", "Linux"),
+    )
+
+    @classmethod
+    def _click(cls, url_shortener_id, **fields) -> dict:
+        click = {
+            "id": str(uuid.uuid4()),
+            "url_shortener_id": url_shortener_id,
+        }
+        for field in cls.FIELDS:
+            value = fields.get(field)
+            max_length = UrlShortenerTracker._meta.get_field(field).max_length
+            click[field] = value[:max_length] if isinstance(value, str) else value
+        click["ip_address"] = click["ip_address"] or ""
+        return click
+
+    @classmethod
+    def _insert(cls, clicks: list) -> None:
+        # created_at is auto_now_add and is stamped at insert, so a click is
+        # never back-dated into a day the rollup compactor already closed
+        UrlShortenerTracker.objects.bulk_create(
+            [
+                UrlShortenerTracker(
+                    **{key: value for key, value in click.items() if key != "attempts"}
+                )
+                for click in clicks
+            ],
+            batch_size=cls.BATCH_SIZE,
+        )
+
+    @classmethod
+    def record(cls, url_shortener_id, **fields) -> None:
+        click = cls._click(url_shortener_id, **fields)
+        try:
+            redis = get_redis_connection("default")
+            pending = (
+                redis.rpush(cls.KEY, json.dumps(click))
+                if redis.llen(cls.KEY) < cls.MAX_PENDING
+                else None
+            )
+        except RedisError as e:
+            logger.warning(f"Click buffer unavailable, inserting directly: {e}")
+            pending = None
+
+        if pending is None:
+            cls._insert([click])
+            return
+
+        try:
+            cls.schedule_flush(immediate=pending >= cls.BATCH_SIZE)
+        except Exception as e:
+            # the click is already buffered; the periodic flush picks it up
+            logger.warning(f"Could not schedule a click buffer flush: {e}")
+
+    @staticmethod
+    def _match(user_agent: str, tokens) -> str:
+        return next((name for token, name in tokens if token in user_agent), None)
+
+    @classmethod
+    def record_request(cls, url_shortener_id, request) -> None:
+        """
+        Records a click from the request that resolved the short URL. The
+        redirect page can pass the visitor's own referrer as ?referrer=,
+        since the request's Referer header is the redirect page itself.
+        """
+        user_agent = request.META.get("HTTP_USER_AGENT", "")
+        if "iPad" in user_agent or "Tablet" in user_agent:
+            device_type = "Tablet"
+        elif "Mobi" in user_agent:
+            device_type = "Mobile"
+        else:
+            device_type = "Desktop" if user_agent else None
+
+        cls.record(
+            url_shortener_id,
+            ip_address=_CustomHTTPHandler.get_client_ip_address(request),
+            browser=cls._match(user_agent, cls.BROWSERS),
+            operating_system=cls._match(user_agent, cls.OPERATING_SYSTEMS),
+            device_type=device_type,
+            referrer=request.query_params.get("referrer")
+            or request.META.get("HTTP_REFERER"),
+        )
+
+    @classmethod
+    def schedule_flush(cls, immediate: bool = False) -> None:
+        from mu_celery.task import flush_url_clicks
+
+        if immediate:
+            if cache.add(cls.IMMEDIATE_FLUSH_KEY, True, timeout=cls.IMMEDIATE_FLUSH_TIMEOUT):
+                flush_url_clicks.delay()
+        elif cache.add(cls.FLUSH_PENDING_KEY, True, timeout=max(1, cls.FLUSH_MS // 1000)):
+            flush_url_clicks.apply_async(countdown=cls.FLUSH_MS / 1000)
+
+    @classmethod
+    def _dead_letter(cls, redis, clicks: list, error) -> None:
+        logger.warning(f"Dropping {len(clicks)} buffered clicks: {error}")
+        pipeline = redis.pipeline()
+        pipeline.rpush(cls.DEAD_KEY, *[json.dumps(click) for click in clicks])
+        pipeline.ltrim(cls.DEAD_KEY, -cls.DEAD_LIMIT, -1)
+        pipeline.execute()
+
+    @classmethod
+    def _requeue(cls, redis, clicks: list, error) -> None:
+        retry, dead = [], []
+        for click in clicks:
+            click["attempts"] = click.get("attempts", 0) + 1
+            (retry if click["attempts"] < cls.MAX_ATTEMPTS else dead).append(click)
+        if retry:
+            redis.rpush(cls.KEY, *[json.dumps(click) for click in retry])
+        if dead:
+            cls._dead_letter(redis, dead, error)
+
+    @classmethod
+    def _insert_each(cls, redis, clicks: list):
+        """
+        Inserts a batch that failed as a whole one row at a time. Returns the
+        number inserted and the rows left to retry after a transient error.
+        """
+        try:
+            live = set(
+                UrlShortener.objects.filter(
+                    id__in={click["url_shortener_id"] for click in clicks}
+                ).values_list("id", flat=True)
+            )
+        except DatabaseError:
+            return 0, clicks
+
+        inserted = 0
+        for position, click in enumerate(clicks):
+            if click["url_shortener_id"] not in live:
+                continue
+            try:
+                cls._insert([click])
+                inserted += 1
+            except (IntegrityError, DataError) as e:
+                cls._dead_letter(redis, [click], e)
+            except DatabaseError:
+                return inserted, clicks[position:]
+            except Exception as e:
+                cls._dead_letter(redis, [click], e)
+        return inserted, []
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Inserts buffered clicks in batches until the buffer is empty. A batch
+        that fails is retried row by row; on a transient error the remaining
+        rows are requeued and the flush stops until the next run.
+        """
+        redis = get_redis_connection("default")
+        cache.delete_many([cls.FLUSH_PENDING_KEY, cls.IMMEDIATE_FLUSH_KEY])
+        flushed = 0
+
+        while True:
+            pipeline = redis.pipeline(transaction=True)
+            pipeline.lrange(cls.KEY, 0, cls.BATCH_SIZE - 1)
+            pipeline.ltrim(cls.KEY, cls.BATCH_SIZE, -1)
+            batch, _ = pipeline.execute()
+            if not batch:
+                return flushed
+
+            clicks = [json.loads(click) for click in batch]
+            try:
+                cls._insert(clicks)
+                flushed += len(clicks)
+            except Exception as e:
+                logger.warning(f"Click batch failed, inserting row by row: {e}")
+                inserted, retry = cls._insert_each(redis, clicks)
+                flushed += inserted
+                if retry:
+                    cls._requeue(redis, retry, e)
+                    return flushed
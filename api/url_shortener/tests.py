@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from .url_analytics import UrlAnalytics
+
+
+class UrlAnalyticsRollupTests(SimpleTestCase):
+    def test_null_and_empty_values_share_a_rollup_row(self):
+        counts = UrlAnalytics._rollup_counts(
+            [
+                ("url-1", None, 3),
+                ("url-1", "", 2),
+                ("url-1", "google.com", 1),
+                ("url-2", None, 4),
+            ]
+        )
+
+        self.assertEqual(
+            counts,
+            {("url-1", ""): 5, ("url-1", "google.com"): 1, ("url-2", ""): 4},
+        )
+
+    def test_values_equal_after_truncation_share_a_rollup_row(self):
+        prefix = "a" * 255
+        counts = UrlAnalytics._rollup_counts(
+            [("url-1", f"{prefix}b", 1), ("url-1", f"{prefix}c", 2)]
+        )
+
+        self.assertEqual(counts, {("url-1", prefix): 3})
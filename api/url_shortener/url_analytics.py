@@ -0,0 +1,305 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Sum, Value
+from django.db.models.functions import Coalesce, Left, TruncDay, TruncHour, TruncWeek
+
+from db.settings import SystemSetting
+from db.url_shortener import UrlShortenerClickRollup, UrlShortenerTracker
+from utils.utils import DateTimeUtils
+
+
+class UrlAnalytics:
+    """
+    Click analytics for a short URL, aggregated in the database.
+
+    Closed days are compacted into daily per-URL dimension counts in
+    url_shortener_click_rollup; raw tracker rows are only read for the days
+    after the compaction watermark. Breakdowns and series merge both.
+
+    Clicks only land in the current bucket, so closed buckets of the series
+    are also cached as a rollup and each request recounts only the buckets
+    closed since the last one plus the open bucket.
+    """
+
+    KEY_PREFIX = "url_analytics"
+    ROLLUP_TIMEOUT = 60 * 60 * 24 * 7
+    WATERMARK_KEY = "url_shortener.rollup_until"
+    RETENTION_DAYS = settings.URL_CLICK_RETENTION_DAYS
+
+    DIMENSIONS = {
+        "browsers": "browser",
+        "platforms": "operating_system",
+        "devices": "device_type",
+        "sources": "referrer",
+        "ip_address": "ip_address",
+        "city": "city",
+        "region": "region",
+        "countries": "country",
+    }
+    CLICKS = "clicks"
+    BUCKETS = {
+        "hour": (TruncHour, timedelta(hours=1)),
+        "day": (TruncDay, timedelta(days=1)),
+        "week": (TruncWeek, timedelta(weeks=1)),
+    }
+    DEFAULT_BUCKET = "hour"
+
+    @classmethod
+    def get_watermark(cls):
+        """
+        Returns the first day whose clicks are still raw, or None if nothing
+        has been compacted yet.
+        """
+        if (watermark := cache.get(f"{cls.KEY_PREFIX}:watermark")) is None:
+            value = (
+                SystemSetting.objects.filter(key=cls.WATERMARK_KEY)
+                .values_list("value", flat=True)
+                .first()
+            )
+            watermark = date.fromisoformat(value) if value else False
+            cache.set(f"{cls.KEY_PREFIX}:watermark", watermark, timeout=60 * 10)
+        return watermark or None
+
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+    @classmethod
+    def _clicks(cls, url_id, watermark=None):
+        clicks = UrlShortenerTracker.objects.filter(url_shortener_id=url_id).order_by()
+        if watermark:
+            clicks = clicks.filter(created_at__gte=cls._day_start(watermark))
+        return clicks
+
+    @staticmethod
+    def _rollups(url_id, dimension: str):
+        return UrlShortenerClickRollup.objects.filter(
+            url_shortener_id=url_id, dimension=dimension
+        ).order_by()
+
+    @classmethod
+    def get_summary(cls, url_id):
+        """
+        Returns the total clicks and first click time, or None if the URL has
+        never been clicked.
+        """
+        watermark = cls.get_watermark()
+        summary = cls._clicks(url_id, watermark).aggregate(
+            total_clicks=Count("id"), created_on=Min("created_at")
+        )
+        if watermark:
+            rolled = cls._rollups(url_id, cls.CLICKS).aggregate(
+                total_clicks=Sum("count"), first_day=Min("date")
+            )
+            if rolled["total_clicks"]:
+                summary["total_clicks"] += rolled["total_clicks"]
+                summary["created_on"] = cls._day_start(rolled["first_day"])
+        return summary if summary["total_clicks"] else None
+
+    @classmethod
+    def get_breakdowns(cls, url_id) -> dict:
+        watermark = cls.get_watermark()
+        breakdowns = {}
+        for name, field in cls.DIMENSIONS.items():
+            counts = {}
+            if watermark:
+                for row in (
+                    cls._rollups(url_id, field)
+                    .values("value")
+                    .annotate(total=Sum("count"))
+                ):
+                    counts[row["value"] or None] = row["total"]
+            for row in (
+                cls._clicks(url_id, watermark).values(field).annotate(count=Count("id"))
+            ):
+                counts[row[field]] = counts.get(row[field], 0) + row["count"]
+            breakdowns[name] = counts
+        return breakdowns
+
+    @classmethod
+    def _count_rollup_buckets(cls, url_id, bucket: str, start, end) -> list:
+        counts = {}
+        rollups = cls._rollups(url_id, cls.CLICKS)
+        if start is not None:
+            rollups = rollups.filter(date__gte=start.date())
+        if end is not None:
+            rollups = rollups.filter(date__lt=end.date())
+
+        # compacted days have no finer resolution than a day
+        for day, clicks in rollups.values_list("date", "count"):
+            if bucket == "week":
+                day -= timedelta(days=day.weekday())
+            counts[cls._day_start(day)] = counts.get(cls._day_start(day), 0) + clicks
+        return [[bucket_start, clicks] for bucket_start, clicks in sorted(counts.items())]
+
+    @classmethod
+    def _count_buckets(cls, url_id, bucket: str, start=None, end=None) -> list:
+        trunc, _ = cls.BUCKETS[bucket]
+        watermark = cls.get_watermark()
+        series = []
+
+        if watermark:
+            raw_start = cls._day_start(watermark)
+            if start is None or start < raw_start:
+                series = cls._count_rollup_buckets(
+                    url_id, bucket, start, min(end, raw_start) if end else raw_start
+                )
+            start = max(start, raw_start) if start else raw_start
+            if end is not None and end <= start:
+                return series
+
+        clicks = cls._clicks(url_id)
+        if start is not None:
+            clicks = clicks.filter(created_at__gte=start)
+        if end is not None:
+            clicks = clicks.filter(created_at__lt=end)
+
+        raw_series = [
+            [row["bucket"], row["count"]]
+            for row in clicks.annotate(bucket=trunc("created_at"))
+            .values("bucket")
+            .annotate(count=Count("id"))
+            .order_by("bucket")
+        ]
+        # a week can straddle the watermark and appear on both sides
+        if series and raw_series and series[-1][0] == raw_series[0][0]:
+            series[-1][1] += raw_series.pop(0)[1]
+        return series + raw_series
+
+    @classmethod
+    def _current_bucket_start(cls, bucket: str):
+        now = DateTimeUtils.get_current_utc_time()
+        start = now.replace(minute=0, second=0, microsecond=0)
+        if bucket in ("day", "week"):
+            start = start.replace(hour=0)
+        if bucket == "week":
+            start -= timedelta(days=start.weekday())
+        return start
+
+    @classmethod
+    def get_series(cls, url_id, bucket: str) -> list:
+        """
+        Returns [bucket start, clicks] pairs in time order, skipping empty
+        buckets.
+        """
+        current_start = cls._current_bucket_start(bucket)
+        key = f"{cls.KEY_PREFIX}:{url_id}:{bucket}"
+        rollup = cache.get(key) or {"until": None, "series": []}
+
+        # compaction merged the raw hours after the cached point into whole
+        # days, which can no longer be split at that point
+        watermark = cls.get_watermark()
+        if rollup["until"] and watermark and rollup["until"] < cls._day_start(watermark):
+            rollup = {"until": None, "series": []}
+
+        if rollup["until"] != current_start:
+            rollup = {
+                "until": current_start,
+                "series": rollup["series"]
+                + cls._count_buckets(url_id, bucket, rollup["until"], current_start),
+            }
+            cache.set(key, rollup, timeout=cls.ROLLUP_TIMEOUT)
+
+        return rollup["series"] + cls._count_buckets(url_id, bucket, current_start)
+
+    @classmethod
+    def invalidate(cls, url_id) -> None:
+        cache.delete_many(
+            [f"{cls.KEY_PREFIX}:{url_id}:{bucket}" for bucket in cls.BUCKETS]
+        )
+
+    @staticmethod
+    def _rollup_counts(rows) -> dict:
+        """
+        Sums (url_shortener_id, value, count) rows into
+        {(url_shortener_id, value): count} keyed the way the rollup unique key
+        sees them: NULL and "" are one value, and values are cut to 255
+        characters.
+        """
+        counts = {}
+        for url_shortener_id, value, count in rows:
+            key = (url_shortener_id, (value or "")[:255])
+            counts[key] = counts.get(key, 0) + count
+        return counts
+
+    @classmethod
+    def _compact_day(cls, day: date) -> None:
+        clicks = UrlShortenerTracker.objects.filter(
+            url_shortener__isnull=False,
+            created_at__gte=cls._day_start(day),
+            created_at__lt=cls._day_start(day + timedelta(days=1)),
+        ).order_by()
+
+        rollups = [
+            UrlShortenerClickRollup(
+                id=uuid.uuid4(),
+                url_shortener_id=row["url_shortener_id"],
+                date=day,
+                dimension=cls.CLICKS,
+                value="",
+                count=row["count"],
+            )
+            for row in clicks.values("url_shortener_id").annotate(count=Count("id"))
+        ]
+        for field in cls.DIMENSIONS.values():
+            grouped = (
+                clicks.annotate(rollup_value=Coalesce(Left(field, 255), Value("")))
+                .values("url_shortener_id", "rollup_value")
+                .annotate(count=Count("id"))
+            )
+            rollups.extend(
+                UrlShortenerClickRollup(
+                    id=uuid.uuid4(),
+                    url_shortener_id=url_shortener_id,
+                    date=day,
+                    dimension=field,
+                    value=value,
+                    count=count,
+                )
+                for (url_shortener_id, value), count in cls._rollup_counts(
+                    (row["url_shortener_id"], row["rollup_value"], row["count"])
+                    for row in grouped
+                ).items()
+            )
+
+        with transaction.atomic():
+            UrlShortenerClickRollup.objects.filter(date=day).delete()
+            UrlShortenerClickRollup.objects.bulk_create(rollups, batch_size=1000)
+            now = DateTimeUtils.get_current_utc_time()
+            watermark = (day + timedelta(days=1)).isoformat()
+            if not SystemSetting.objects.filter(key=cls.WATERMARK_KEY).update(
+                value=watermark, updated_at=now
+            ):
+                SystemSetting.objects.create(
+                    key=cls.WATERMARK_KEY,
+                    value=watermark,
+                    updated_at=now,
+                    created_at=now,
+                )
+
+    @classmethod
+    def compact(cls) -> None:
+        """
+        Rolls every closed day since the watermark into daily counts, then
+        purges raw clicks that are both compacted and past the retention
+        window.
+        """
+        today = DateTimeUtils.get_current_utc_time().date()
+        day = cls.get_watermark()
+        if day is None:
+            first_click = UrlShortenerTracker.objects.aggregate(first=Min("created_at"))["first"]
+            day = first_click.astimezone(timezone.utc).date() if first_click else today
+
+        while day < today:
+            cls._compact_day(day)
+            day += timedelta(days=1)
+        cache.delete(f"{cls.KEY_PREFIX}:watermark")
+
+        purge_before = min(day, today - timedelta(days=cls.RETENTION_DAYS))
+        UrlShortenerTracker.objects.filter(
+            created_at__lt=cls._day_start(purge_before)
+        ).delete()
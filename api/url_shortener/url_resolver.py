@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from db.url_shortener import UrlShortener
+
+
+class ShortUrlResolver:
+    """
+    Read-through cache from short code to the short URL's id and long URL.
+
+    Lookups go through a small in-process LRU, then the Redis cache, then
+    MySQL. Unknown codes are cached as misses in Redis only, so a code
+    created by another process is not hidden by a local miss. Local entries
+    live for LOCAL_TTL seconds because other processes cannot evict them;
+    creates, edits and deletes evict the shared entry and this process's
+    local one. Hit and
+    miss counts are kept per process and added to a Redis hash every
+    STATS_FLUSH_EVERY lookups.
+    """
+
+    KEY_PREFIX = "short_url_entry"
+    STATS_KEY = "short_url:stats"
+    NOT_FOUND = ()
+    TIMEOUT = 60 * 60 * 24
+    NOT_FOUND_TIMEOUT = 60 * 5
+    LOCAL_SIZE = 2048
+    LOCAL_TTL = 30
+    STATS_FLUSH_EVERY = 100
+
+    _local = OrderedDict()
+    _stats = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _key(cls, short_code: str) -> str:
+        return f"{cls.KEY_PREFIX}:{short_code}"
+
+    @classmethod
+    def _count(cls, outcome: str) -> None:
+        with cls._lock:
+            cls._stats[outcome] = cls._stats.get(outcome, 0) + 1
+            if sum(cls._stats.values()) < cls.STATS_FLUSH_EVERY:
+                return
+            stats, cls._stats = cls._stats, {}
+
+        pipeline = get_redis_connection("default").pipeline()
+        for field, amount in stats.items():
+            pipeline.hincrby(cls.STATS_KEY, field, amount)
+        pipeline.execute()
+
+    @classmethod
+    def _get_local(cls, short_code: str):
+        with cls._lock:
+            if (entry := cls._local.get(short_code)) is None:
+                return None
+            resolved, expires_at = entry
+            if expires_at < time.monotonic():
+                del cls._local[short_code]
+                return None
+            cls._local.move_to_end(short_code)
+            return resolved
+
+    @classmethod
+    def _set_local(cls, short_code: str, resolved: tuple) -> None:
+        if not resolved:
+            return
+        with cls._lock:
+            cls._local[short_code] = (resolved, time.monotonic() + cls.LOCAL_TTL)
+            cls._local.move_to_end(short_code)
+            while len(cls._local) > cls.LOCAL_SIZE:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def resolve(cls, short_code: str):
+        """
+        Returns (url_id, long_url) for a short code, or None if there is none.
+        """
+        if (resolved := cls._get_local(short_code)) is not None:
+            cls._count("local_hit")
+        elif (resolved := cache.get(cls._key(short_code))) is not None:
+            cls._count("cache_hit")
+            cls._set_local(short_code, resolved)
+        else:
+            cls._count("miss")
+            resolved = (
+                UrlShortener.objects.filter(short_url=short_code)
+                .values_list("id", "long_url")
+                .first()
+            ) or cls.NOT_FOUND
+            cache.set(
+                cls._key(short_code),
+                tuple(resolved),
+                timeout=cls.TIMEOUT if resolved else cls.NOT_FOUND_TIMEOUT,
+            )
+            cls._set_local(short_code, resolved)
+
+        return tuple(resolved) or None
+
+    @classmethod
+    def invalidate(cls, *short_codes: str) -> None:
+        short_codes = [short_code for short_code in short_codes if short_code]
+        cache.delete_many([cls._key(short_code) for short_code in short_codes])
+        with cls._lock:
+            for short_code in short_codes:
+                cls._local.pop(short_code, None)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = {
+            (field.decode() if isinstance(field, bytes) else field): int(value)
+            for field, value in get_redis_connection("default")
+            .hgetall(cls.STATS_KEY)
+            .items()
+        }
+        lookups = sum(stats.values())
+        hits = stats.get("local_hit", 0) + stats.get("cache_hit", 0)
+        return {
+            **stats,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(cls._local),
+        }
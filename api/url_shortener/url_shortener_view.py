@@ -4,13 +4,18 @@ from api.url_shortener.serializers import (
     ShowShortenUrlsSerializer,
     ShortenUrlsCreateUpdateSerializer
 )
-from db.url_shortener import UrlShortener, UrlShortenerTracker
+from db.url_shortener import UrlShortener
+from utils.exception import CustomException
 from utils.permission import CustomizePermission
 from utils.permission import role_required
 from utils.types import RoleType
 from utils.response import CustomResponse
 from utils.utils import CommonUtils
 
+from .click_buffer import ClickBuffer
+from .url_analytics import UrlAnalytics
+from .url_resolver import ShortUrlResolver
+
 
 class UrlShortenerAPI(APIView):
     authentication_classes = [CustomizePermission]
@@ -28,7 +33,9 @@ class UrlShortenerAPI(APIView):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            url_shortener = serializer.save()
+            # a lookup made before the create may have cached a miss
+            ShortUrlResolver.invalidate(url_shortener.short_url)
 
             return CustomResponse(
                 general_message="Url created successfully."
@@ -44,21 +51,28 @@ class UrlShortenerAPI(APIView):
     def get(self, request):
         url_shortener_objects = UrlShortener.objects.all().order_by('-created_at')
 
-        paginated_queryset = CommonUtils.get_paginated_queryset(
-            url_shortener_objects,
-            request,
-            [
-                "title",
-                "short_url",
-                "long_url"
-            ],
-            {
-                "title": "title",
-                "created_at": "created_at"
-            },
-        )
+        try:
+            paginated_queryset = CommonUtils.get_paginated_queryset(
+                url_shortener_objects,
+                request,
+                [
+                    "title",
+                    "short_url",
+                    "long_url"
+                ],
+                {
+                    "title": "title",
+                    "created_at": "created_at"
+                },
+                allow_cursor=True,
+                count_mode="cached",
+            )
+        except CustomException as e:
+            return CustomResponse(
+                general_message=str(e)
+            ).get_failure_response()
 
-        if len(url_shortener_objects) == 0:
+        if not url_shortener_objects.exists():
             return CustomResponse(
                 general_message="No URL related data available"
             ).get_failure_response()
@@ -88,6 +102,7 @@ class UrlShortenerAPI(APIView):
                 general_message="Invalid Url ID"
             ).get_failure_response()
 
+        old_short_url = url_shortener.short_url
         serializer = ShortenUrlsCreateUpdateSerializer(
             url_shortener,
             data=request.data,
@@ -97,6 +112,7 @@ class UrlShortenerAPI(APIView):
         )
         if serializer.is_valid():
             serializer.save()
+            ShortUrlResolver.invalidate(old_short_url, url_shortener.short_url)
 
             return CustomResponse(
                 general_message="Url Edited Successfully"
@@ -120,6 +136,8 @@ class UrlShortenerAPI(APIView):
             ).get_success_response()
 
         url_shortener_object.delete()
+        UrlAnalytics.invalidate(url_id)
+        ShortUrlResolver.invalidate(url_shortener_object.short_url)
         return CustomResponse(
             general_message="Url deleted successfully.."
         ).get_success_response()
@@ -132,58 +150,32 @@ class UrlAnalyticsAPI(APIView):
         [RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value]
     )
     def get(self, request, url_id):
-        queryset = UrlShortenerTracker.objects.filter(url_shortener__id=url_id)
-        # long and short url
         url_shortener = UrlShortener.objects.filter(id=url_id).first()
+        summary = UrlAnalytics.get_summary(url_id) if url_shortener else None
 
-        if not queryset.exists():
+        if summary is None:
             # Return an appropriate response for the case where no records are found
             return CustomResponse(
                 general_message="No records found"
             ).get_failure_response()
 
-        browsers = {}
-        platforms = {}
-        devices = {}
-        sources = {}
-        countries = {}
-        ip_address = {}
-        city = {}
-        region = {}
-        time_based_data = {'all_time': []}
-
-        for query in queryset:
-            # Counting browsers, platforms, devices, sources, countries, and dimensions
-            browsers[query.browser] = browsers.get(query.browser, 0) + 1
-            platforms[query.operating_system] = platforms.get(
-                query.operating_system, 0) + 1
-            devices[query.device_type] = devices.get(
-                query.device_type, 0) + 1
-            sources[query.referrer] = sources.get(query.referrer, 0) + 1
-            countries[query.country] = countries.get(query.country, 0) + 1
-            ip_address[query.ip_address] = ip_address.get(
-                query.ip_address, 0) + 1
-            city[query.city] = city.get(query.city, 0) + 1
-            region[query.region] = region.get(query.region, 0) + 1
-
-            # Create a list of time-based data
-            time_based_data['all_time'].append([
-                query.created_at.strftime(
-                    '%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
-                1  # Assuming each record contributes 1 click
-            ])
+        bucket = request.query_params.get("bucket", UrlAnalytics.DEFAULT_BUCKET)
+        if bucket not in UrlAnalytics.BUCKETS:
+            return CustomResponse(
+                general_message=f"bucket must be one of {', '.join(UrlAnalytics.BUCKETS)}"
+            ).get_failure_response()
+
+        time_based_data = {
+            'all_time': [
+                [timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z', clicks]
+                for timestamp, clicks in UrlAnalytics.get_series(url_id, bucket)
+            ]
+        }
 
         result = {
-            'total_clicks': queryset.count(),
-            'created_on': queryset.first().created_at.strftime('%Y-%m-%d'),
-            'browsers': browsers,
-            'platforms': platforms,
-            'devices': devices,
-            'sources': sources,
-            'ip_address': ip_address,
-            'city': city,
-            'region': region,
-            'countries': countries,
+            'total_clicks': summary['total_clicks'],
+            'created_on': summary['created_on'].strftime('%Y-%m-%d'),
+            **UrlAnalytics.get_breakdowns(url_id),
             'time_based_data': time_based_data,
             'long_url': url_shortener.long_url,
             'short_url': url_shortener.short_url,
@@ -191,3 +183,30 @@ class UrlAnalyticsAPI(APIView):
         }
 
         return CustomResponse(response=result).get_success_response()
+
+
+class ResolveShortUrlAPI(APIView):
+
+    def get(self, request, short_url):
+        if resolved := ShortUrlResolver.resolve(short_url):
+            url_id, long_url = resolved
+            ClickBuffer.record_request(url_id, request)
+            return CustomResponse(
+                response={"long_url": long_url}
+            ).get_success_response()
+
+        return CustomResponse(
+            general_message="Invalid short url"
+        ).get_failure_response()
+
+
+class ShortUrlResolverStatsAPI(APIView):
+    authentication_classes = [CustomizePermission]
+
+    @role_required(
+        [RoleType.ADMIN.value, RoleType.FELLOW.value, RoleType.ASSOCIATE.value]
+    )
+    def get(self, request):
+        return CustomResponse(
+            response=ShortUrlResolver.get_stats()
+        ).get_success_response()
@@ -9,4 +9,6 @@ urlpatterns = [
     path('delete/<str:url_id>/', url_shortener_view.UrlShortenerAPI.as_view()),
 
     path('get-analytics/<str:url_id>/', url_shortener_view.UrlAnalyticsAPI.as_view()),
+    path('resolve/<path:short_url>/', url_shortener_view.ResolveShortUrlAPI.as_view()),
+    path('resolver-stats/', url_shortener_view.ShortUrlResolverStatsAPI.as_view()),
 ]
@@ -175,6 +175,18 @@ class KarmaActivityLog(models.Model):
         db_table = "karma_activity_log"
 
 
+class KarmaApprovalCount(models.Model):
+    id = models.CharField(primary_key=True, max_length=36)
+    approver = models.ForeignKey(User, on_delete=models.CASCADE, related_name="karma_approval_count_approver")
+    approval_type = models.CharField(max_length=20)
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = "karma_approval_count"
+
+
 class MucoinActivityLog(models.Model):
     id = models.CharField(primary_key=True, max_length=36)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mucoin_activity_log_user")
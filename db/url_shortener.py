@@ -45,3 +45,17 @@ class UrlShortenerTracker(models.Model):
     class Meta:
         managed = False
         db_table = 'url_shortener_tracker'
+
+
+class UrlShortenerClickRollup(models.Model):
+    id = models.CharField(primary_key=True, max_length=36)
+    url_shortener = models.ForeignKey(UrlShortener, on_delete=models.CASCADE,
+                                      related_name='url_shortener_click_rollup_url')
+    date = models.DateField()
+    dimension = models.CharField(max_length=50)
+    value = models.CharField(max_length=255, default='')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'url_shortener_click_rollup'
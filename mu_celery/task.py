@@ -2,7 +2,17 @@ from celery import shared_task
 from utils.utils import send_template_mail
 import requests
 from decouple import config
+from api.common.common_consumer import landing_stats
+from api.dashboard.discord_moderator.moderator_leaderboard import ModeratorLeaderboard
+from api.dashboard.export.export_helper import ExportJob
+from api.dashboard.karma_voucher.voucher_delivery import VoucherDelivery
+from api.leaderboard.leaderboard_snapshot import LeaderboardSnapshot
+from api.url_shortener.click_buffer import ClickBuffer
+from api.url_shortener.url_analytics import UrlAnalytics
 from db.user import User
+from utils.discord_webhook import DiscordWebhookDispatcher
+from utils.rank_index import KarmaRankIndex
+from utils.search import SearchIndex
 
 DISCORD_GUILD_ID = config("DISCORD_GUILD_ID")
 DISCORD_BOT_TOKEN = config("DISCORD_BOT_TOKEN")
@@ -48,3 +58,70 @@ def onboard_user(access_token: str, user_id: int):
     ):
         return {"status": "error", "message": "Failed to join guild"}
     return {"status": "success", "message": "User onboarded successfully"}
+
+
+@shared_task
+def rebuild_karma_rank_index():
+    # The discord bot writes karma straight to the database, bypassing signals,
+    # so the rank index is reconciled against the wallet table periodically.
+    KarmaRankIndex.rebuild_all()
+
+
+@shared_task
+def refresh_leaderboard_snapshots():
+    LeaderboardSnapshot.refresh_all()
+
+
+@shared_task
+def broadcast_landing_stats():
+    landing_stats.broadcast()
+
+
+@shared_task
+def reconcile_landing_stats():
+    landing_stats.reconcile()
+
+
+@shared_task
+def run_export_job(job_id: str):
+    ExportJob.run(job_id)
+
+
+@shared_task
+def purge_export_artifacts():
+    ExportJob.purge_artifacts()
+
+
+@shared_task
+def rebuild_search_index(label: str):
+    SearchIndex.rebuild(label)
+
+
+@shared_task
+def rebuild_search_indexes():
+    SearchIndex.rebuild_all()
+
+
+@shared_task
+def compact_url_clicks():
+    UrlAnalytics.compact()
+
+
+@shared_task
+def flush_url_clicks():
+    ClickBuffer.flush()
+
+
+@shared_task
+def deliver_vouchers(batch_id: str, vouchers: list):
+    VoucherDelivery.deliver(batch_id, vouchers)
+
+
+@shared_task
+def flush_discord_webhooks():
+    DiscordWebhookDispatcher.flush()
+
+
+@shared_task
+def refresh_moderator_leaderboard():
+    ModeratorLeaderboard.refresh()
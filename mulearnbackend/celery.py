@@ -15,3 +15,5 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+# mu_celery is not an installed app and keeps its tasks in task.py
+app.autodiscover_tasks(["mu_celery"], related_name="task")
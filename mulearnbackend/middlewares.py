@@ -5,6 +5,7 @@ import json
 import json
 import logging
 import traceback
+import uuid
 
 import decouple
 from django.conf import settings
@@ -12,6 +13,7 @@ from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.renderers import JSONRenderer
 
+from api.dashboard.error_log.error_helper import ErrorStore
 from utils.exception import CustomException
 from utils.response import CustomResponse
 from utils.utils import _CustomHTTPHandler
@@ -107,20 +109,40 @@ class UniversalErrorHandlerMiddleware:
 
         """
 
-        body = request._body.decode("utf-8") if hasattr(request, "_body") else "No body"
-        auth = request.auth if hasattr(request, "auth") else "No Auth data"
+        raw_body = request._body.decode("utf-8") if hasattr(request, "_body") else "No body"
+        raw_auth = request.auth if hasattr(request, "auth") else "No Auth data"
+        body, auth = raw_body, raw_auth
 
         with suppress(json.JSONDecodeError):
-            body = json.loads(body)
-            body = json.dumps(body, indent=4)
+            raw_body = json.loads(raw_body)
+            body = json.dumps(raw_body, indent=4)
 
         with suppress(json.JSONDecodeError):
-            auth = json.dumps(auth, indent=4)
+            auth = json.dumps(raw_auth, indent=4)
 
         exception_id = self.generate_error_id(exception, request)
+        occurrence = uuid.uuid4().hex
+
+        # indexed before the text log is written, so ErrorStore.ingest always
+        # finds the occurrence marked as done; an index failure is never fatal
+        try:
+            ErrorStore.record(
+                exception_id,
+                type(exception).__name__,
+                str(exception),
+                request.method,
+                request.path,
+                auth=raw_auth,
+                body=raw_body,
+                traceback=traceback.format_exc(),
+                occurrence=occurrence,
+            )
+        except Exception as e:
+            logger.warning(f"Could not index error {exception_id}: {e}")
 
         request_info = (
             f"EXCEPTION INFO:\n"
+            f"OCCURRENCE: {occurrence}\n"
             f"ID: {exception_id}\n"
             f"TYPE: {type(exception).__name__}\n"
             f"MESSAGE: {str(exception)}\n"
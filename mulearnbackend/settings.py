@@ -73,6 +73,7 @@ REST_FRAMEWORK = {
 }
 # paginator settings
 PAGE_SIZE = 10
+PAGINATOR_COUNT_CACHE_SECONDS = 60
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -137,6 +138,75 @@ CACHES = {
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
 CELERY_RESULT_BACKEND = f"redis://{REDIS_HOST}:{REDIS_PORT}/2"
 
+LEADERBOARD_SNAPSHOT_REFRESH_SECONDS = decouple_config(
+    "LEADERBOARD_SNAPSHOT_REFRESH_SECONDS", default=300, cast=int
+)
+
+LANDING_STATS_BROADCAST_SECONDS = decouple_config(
+    "LANDING_STATS_BROADCAST_SECONDS", default=5, cast=int
+)
+
+EXPORT_JOB_TTL_SECONDS = decouple_config("EXPORT_JOB_TTL_SECONDS", default=3600, cast=int)
+EXPORT_JOB_STALE_SECONDS = decouple_config("EXPORT_JOB_STALE_SECONDS", default=600, cast=int)
+EXPORT_DOWNLOAD_URL_SECONDS = decouple_config("EXPORT_DOWNLOAD_URL_SECONDS", default=300, cast=int)
+# export artifacts are served only through signed download links, never from MEDIA_ROOT
+EXPORT_ROOT = decouple_config("EXPORT_ROOT", default=os.path.join(BASE_DIR, "exports"))
+
+IMPORT_MAX_ROWS = decouple_config("IMPORT_MAX_ROWS", default=20000, cast=int)
+
+DISCORD_WEBHOOK_FLUSH_MS = decouple_config("DISCORD_WEBHOOK_FLUSH_MS", default=1000, cast=int)
+
+VOUCHER_DELIVERY_CHUNK_SIZE = decouple_config("VOUCHER_DELIVERY_CHUNK_SIZE", default=25, cast=int)
+
+URL_CLICK_RETENTION_DAYS = decouple_config("URL_CLICK_RETENTION_DAYS", default=90, cast=int)
+URL_CLICK_FLUSH_MS = decouple_config("URL_CLICK_FLUSH_MS", default=500, cast=int)
+URL_CLICK_BATCH_SIZE = decouple_config("URL_CLICK_BATCH_SIZE", default=500, cast=int)
+URL_CLICK_MAX_PENDING = decouple_config("URL_CLICK_MAX_PENDING", default=100000, cast=int)
+
+SEARCH_BACKEND = decouple_config(
+    "SEARCH_BACKEND", default="utils.search.RedisTrigramSearchBackend"
+)
+SEARCH_MAX_KEYS = decouple_config("SEARCH_MAX_KEYS", default=5000, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-karma-rank-index": {
+        "task": "mu_celery.task.rebuild_karma_rank_index",
+        "schedule": decouple_config("KARMA_RANK_INDEX_REBUILD_SECONDS", default=900, cast=int),
+    },
+    "refresh-leaderboard-snapshots": {
+        "task": "mu_celery.task.refresh_leaderboard_snapshots",
+        "schedule": LEADERBOARD_SNAPSHOT_REFRESH_SECONDS,
+    },
+    "reconcile-landing-stats": {
+        "task": "mu_celery.task.reconcile_landing_stats",
+        "schedule": decouple_config("LANDING_STATS_RECONCILE_SECONDS", default=600, cast=int),
+    },
+    "purge-export-artifacts": {
+        "task": "mu_celery.task.purge_export_artifacts",
+        "schedule": EXPORT_JOB_TTL_SECONDS,
+    },
+    "flush-discord-webhooks": {
+        "task": "mu_celery.task.flush_discord_webhooks",
+        "schedule": 60,
+    },
+    "flush-url-clicks": {
+        "task": "mu_celery.task.flush_url_clicks",
+        "schedule": 60,
+    },
+    "compact-url-clicks": {
+        "task": "mu_celery.task.compact_url_clicks",
+        "schedule": 60 * 60 * 24,
+    },
+    "refresh-moderator-leaderboard": {
+        "task": "mu_celery.task.refresh_moderator_leaderboard",
+        "schedule": decouple_config("MODERATOR_LEADERBOARD_REFRESH_SECONDS", default=600, cast=int),
+    },
+    "rebuild-search-indexes": {
+        "task": "mu_celery.task.rebuild_search_indexes",
+        "schedule": decouple_config("SEARCH_INDEX_REBUILD_SECONDS", default=86400, cast=int),
+    },
+}
+
 # Use the Redis cache as the default cache
 CACHES["default"] = CACHES["redis"]
 
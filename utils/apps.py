@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utils'
+
+    def ready(self) -> None:
+        from utils import rank_index  # noqa: F401 - connects the rank index signals
+        from utils import search  # noqa: F401 - connects the search index signals
+        from utils import permission  # noqa: F401 - connects the dynamic permission signals
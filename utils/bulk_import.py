@@ -0,0 +1,179 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+
+class BulkImport:
+    """
+    Base for spreadsheet imports that validate rows against the database and
+    bulk-insert the valid ones.
+
+    Rows are cut down to `columns` as they are read, so the sheet is walked
+    once. Each column in `lookups` is resolved with one IN query, rows
+    repeating a `unique` key within the file or against the database are
+    caught with sets, and valid rows are written with bulk_create in one
+    transaction. Subclasses set the class attributes and implement build().
+
+    lookups maps a column to {"model", "field", "values", "error"}: the
+    column is matched against `field`, `values` are fetched for each match
+    and `error` is formatted with the value when nothing matches. An
+    "optional" lookup may be left empty.
+
+    unique maps a key name to {"columns", "duplicate", "exists"}: the
+    messages for a key repeated within the file and for one already in the
+    database, formatted with the key's values.
+    """
+
+    model = None
+    columns = []
+    required = []
+    max_lengths = {}
+    lookups = {}
+    unique = {}
+    batch_size = 500
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.rows = []
+        self.refs = {}
+        self.rejected = False
+
+    def missing_columns(self, headers) -> list:
+        return [column for column in self.columns if column not in headers]
+
+    def load(self, rows) -> None:
+        for row in rows:
+            row = {column: row.get(column) for column in self.columns}
+            if any(value not in (None, "") for value in row.values()):
+                self.rows.append(row)
+
+    def resolve(self) -> None:
+        for column, lookup in self.lookups.items():
+            values = {row[column] for row in self.rows if row[column] not in (None, "")}
+            self.refs[column] = {
+                ref[lookup["field"]]: ref
+                for ref in lookup["model"]
+                .objects.filter(**{f"{lookup['field']}__in": values})
+                .values(lookup["field"], *lookup["values"])
+            }
+
+    def ref(self, row, column):
+        return self.refs[column].get(row[column])
+
+    def key(self, row, name: str):
+        """
+        Returns the row's value for a unique key, or None if part of it is
+        empty.
+        """
+        key = tuple(row[column] for column in self.unique[name]["columns"])
+        return None if any(value in (None, "") for value in key) else key
+
+    def existing_keys(self, name: str, keys: set) -> set:
+        """
+        Returns which of the file's keys are already in the database. Key
+        columns are matched against the model fields of the same name,
+        batch_size keys per query; a multi-column key is matched with an OR
+        of its column values. Override it when the columns are not fields.
+        """
+        columns = self.unique[name]["columns"]
+        keys = list(keys)
+        existing = set()
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            if len(columns) == 1:
+                query = Q(**{f"{columns[0]}__in": [key[0] for key in batch]})
+            else:
+                query = reduce(or_, (Q(**dict(zip(columns, key))) for key in batch))
+            existing.update(self.model.objects.filter(query).values_list(*columns))
+        return existing
+
+    def clean(self, row):
+        """
+        Returns an error message for the row, or None if it is valid. The
+        default only checks the lookups.
+        """
+        for column, lookup in self.lookups.items():
+            if lookup.get("optional") and row[column] in (None, ""):
+                continue
+            if self.ref(row, column) is None:
+                return lookup["error"].format(row[column])
+        return None
+
+    def prepare(self, rows) -> None:
+        """
+        Called with the valid rows before any instance is built.
+        """
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def success(self, row, instance) -> dict:
+        return {column: row[column] for column in self.columns}
+
+    def after_create(self, rows, instances) -> None:
+        """
+        Called inside the transaction once the instances are written. Work
+        outside the database belongs in transaction.on_commit, so it does not
+        run for an import that is rolled back.
+        """
+
+    def _error(self, row, seen: dict, existing: dict):
+        for column in self.required:
+            if row[column] in (None, ""):
+                return f"Missing {column}."
+        for column, max_length in self.max_lengths.items():
+            if row[column] is not None and len(str(row[column])) > max_length:
+                return f"{column} must not exceed {max_length} characters."
+
+        for name, unique in self.unique.items():
+            if (key := self.key(row, name)) is None:
+                continue
+            if key in seen[name]:
+                return unique["duplicate"].format(*key)
+            seen[name].add(key)
+            if key in existing[name]:
+                return unique["exists"].format(*key)
+
+        return self.clean(row)
+
+    def run(self, rows, dry_run: bool = False) -> dict:
+        """
+        Validates and writes the rows, returning {"Success", "Failed"}.
+        With dry_run, or when the import is rejected, nothing is written and
+        Success lists the rows that would have been.
+        """
+        self.load(rows)
+        self.resolve()
+
+        existing = {}
+        for name in self.unique:
+            keys = {key for row in self.rows if (key := self.key(row, name))}
+            existing[name] = self.existing_keys(name, keys) if keys else set()
+
+        seen = {name: set() for name in self.unique}
+        valid_rows = []
+        failed_rows = []
+        for row in self.rows:
+            if error := self._error(row, seen, existing):
+                failed_rows.append({**row, "error": error})
+            else:
+                valid_rows.append(row)
+
+        if dry_run or self.rejected:
+            return {"Success": valid_rows, "Failed": failed_rows}
+
+        self.prepare(valid_rows)
+        instances = [self.build(row) for row in valid_rows]
+        with transaction.atomic():
+            self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+            self.after_create(valid_rows, instances)
+
+        return {
+            "Success": [
+                self.success(row, instance)
+                for row, instance in zip(valid_rows, instances)
+            ],
+            "Failed": failed_rows,
+        }
@@ -0,0 +1,222 @@
+import json
+import logging
+import time
+
+import requests
+from decouple import config
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from utils.types import WebHookActions, WebHookCategory
+
+logger = logging.getLogger(__name__)
+
+
+class DiscordWebhookDispatcher:
+    """
+    Queues Discord webhook events in Redis and posts them from a Celery task.
+
+    Events are pushed onto a Redis list and a flush is scheduled FLUSH_MS
+    later, so a burst shares one flush and one pooled HTTP session. The bot
+    parses one event per message, so events are only merged where the
+    format allows it: BULK_ROLE events for the same role and action have
+    their user lists joined, split again only where a message would pass
+    Discord's content limit. When Redis is unavailable the event is posted
+    inline.
+    """
+
+    KEY = "discord_webhook_queue"
+    DEAD_KEY = "discord_webhook_queue:dead"
+    DEAD_LIMIT = 1000
+    FLUSH_PENDING_KEY = "discord_webhook_queue:flush_pending"
+    LOCK_KEY = "discord_webhook_queue:lock"
+    FLUSH_MS = settings.DISCORD_WEBHOOK_FLUSH_MS
+    BATCH_SIZE = 500
+    CONTENT_LIMIT = 2000
+    TIMEOUT = (3, 10)
+    MAX_RETRIES = 4
+    BACKOFF_SECONDS = 1
+
+    _session = None
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            cls._session = requests.Session()
+        return cls._session
+
+    @staticmethod
+    def _content(category, action, *values) -> str:
+        return WebHookActions.SEPARATOR.value.join(
+            [str(category), str(action), *[str(value) for value in values]]
+        )
+
+    @classmethod
+    def dispatch(cls, category, action, *values) -> None:
+        event = [category, action, *[str(value) for value in values]]
+        try:
+            get_redis_connection("default").rpush(cls.KEY, json.dumps(event))
+        except RedisError as e:
+            logger.warning(f"Webhook queue unavailable, posting inline: {e}")
+            cls._post(cls._content(*event))
+            return
+
+        try:
+            cls.schedule_flush()
+        except Exception as e:
+            # the event is already queued; the periodic flush picks it up
+            logger.warning(f"Could not schedule a webhook flush: {e}")
+
+    @classmethod
+    def schedule_flush(cls) -> None:
+        from mu_celery.task import flush_discord_webhooks
+
+        if cache.add(cls.FLUSH_PENDING_KEY, True, timeout=max(1, cls.FLUSH_MS // 1000)):
+            flush_discord_webhooks.apply_async(countdown=cls.FLUSH_MS / 1000)
+
+    @classmethod
+    def coalesce(cls, events: list) -> list:
+        """
+        Returns message contents for the events, in order. A BULK_ROLE event
+        joins the previous one for the same role and action unless some other
+        kind of event came in between.
+        """
+        merged = []
+        open_groups = {}
+        for category, action, *values in events:
+            if category == WebHookCategory.BULK_ROLE.value and len(values) == 2:
+                role, users = values
+                if (index := open_groups.get((action, role))) is not None:
+                    merged[index][3].extend(users.split(","))
+                    continue
+                open_groups[(action, role)] = len(merged)
+                merged.append([category, action, role, users.split(",")])
+            else:
+                open_groups.clear()
+                merged.append([category, action, *values])
+
+        contents = []
+        for category, action, *values in merged:
+            if category != WebHookCategory.BULK_ROLE.value or len(values) != 2:
+                contents.append(cls._content(category, action, *values))
+                continue
+
+            role, users = values
+            users = list(dict.fromkeys(users))
+            prefix = cls._content(category, action, role, "")
+            chunk = []
+            for user in users:
+                if chunk and len(prefix) + len(",".join([*chunk, user])) > cls.CONTENT_LIMIT:
+                    contents.append(prefix + ",".join(chunk))
+                    chunk = []
+                chunk.append(user)
+            contents.append(prefix + ",".join(chunk))
+        return contents
+
+    @classmethod
+    def _post(cls, content: str) -> None:
+        """
+        Posts one message, waiting out 429s for as long as Discord asks and
+        backing off exponentially on connection errors and 5xx responses.
+        """
+        url = config("DISCORD_WEBHOOK_LINK")
+        for attempt in range(cls.MAX_RETRIES + 1):
+            try:
+                response = cls._get_session().post(
+                    url, json={"content": content}, timeout=cls.TIMEOUT
+                )
+            except requests.RequestException:
+                if attempt == cls.MAX_RETRIES:
+                    raise
+                time.sleep(cls.BACKOFF_SECONDS * 2**attempt)
+                continue
+
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                try:
+                    retry_after = response.json().get("retry_after", retry_after)
+                except ValueError:
+                    pass
+                time.sleep(float(retry_after or cls.BACKOFF_SECONDS * 2**attempt))
+                continue
+            if response.status_code >= 500 and attempt < cls.MAX_RETRIES:
+                time.sleep(cls.BACKOFF_SECONDS * 2**attempt)
+                continue
+            response.raise_for_status()
+
+            # spend the bucket without tripping it
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                time.sleep(float(response.headers.get("X-RateLimit-Reset-After", 0)))
+            return
+
+        raise requests.HTTPError(f"Discord kept rate limiting the webhook: {content[:100]}")
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        """
+        A 4xx other than 429 (bad payload, revoked or unknown webhook) fails
+        the same way on every retry.
+        """
+        response = getattr(error, "response", None)
+        return (
+            isinstance(error, requests.HTTPError)
+            and response is not None
+            and 400 <= response.status_code < 500
+            and response.status_code != 429
+        )
+
+    @classmethod
+    def _dead_letter(cls, redis, content: str, error: Exception) -> None:
+        logger.error(f"Dropping Discord webhook message {content[:100]!r}: {error}")
+        pipeline = redis.pipeline()
+        pipeline.rpush(cls.DEAD_KEY, content)
+        pipeline.ltrim(cls.DEAD_KEY, -cls.DEAD_LIMIT, -1)
+        pipeline.execute()
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Posts queued events in batches until the queue is empty. Only one
+        flush runs at a time so messages keep their order. A message Discord
+        rejects outright goes to a capped dead-letter list; after a connection
+        error or 5xx the unsent part of the batch is put back for the next
+        flush.
+        """
+        redis = get_redis_connection("default")
+        cache.delete(cls.FLUSH_PENDING_KEY)
+        lock = redis.lock(cls.LOCK_KEY, timeout=60 * 10)
+        if not lock.acquire(blocking=False):
+            return 0
+
+        sent = 0
+        try:
+            while True:
+                pipeline = redis.pipeline(transaction=True)
+                pipeline.lrange(cls.KEY, 0, cls.BATCH_SIZE - 1)
+                pipeline.ltrim(cls.KEY, cls.BATCH_SIZE, -1)
+                batch, _ = pipeline.execute()
+                if not batch:
+                    return sent
+
+                contents = cls.coalesce([json.loads(event) for event in batch])
+                for index, content in enumerate(contents):
+                    try:
+                        cls._post(content)
+                    except Exception as e:
+                        if cls._is_permanent(e):
+                            cls._dead_letter(redis, content, e)
+                            continue
+                        # merged messages go back as events, so they merge again
+                        redis.lpush(
+                            cls.KEY,
+                            *[
+                                json.dumps(unsent.split(WebHookActions.SEPARATOR.value))
+                                for unsent in reversed(contents[index:])
+                            ],
+                        )
+                        raise
+                    sent += 1
+        finally:
+            lock.release()
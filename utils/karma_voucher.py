@@ -1,3 +1,4 @@
+from functools import lru_cache
 from io import BytesIO
 from typing import Optional
 
@@ -8,6 +9,19 @@ import time
 image_location = './api/dashboard/karma_voucher/assets/karmacard.png'
 font_location =  './api/dashboard/karma_voucher/fonts/Roboto-Light.ttf'
 
+
+@lru_cache(maxsize=None)
+def _load_template():
+    # decoded once per process; every card draws on a copy
+    with Image.open(image_location) as image:
+        return image.convert('RGB')
+
+
+@lru_cache(maxsize=None)
+def _load_font(size):
+    return ImageFont.truetype(font_location, size=size)
+
+
 def generate_karma_voucher(name, hashtag, karma, code, month):
     """
     Generate a karma voucher for the given users
@@ -17,37 +31,15 @@ def generate_karma_voucher(name, hashtag, karma, code, month):
     :param code:
     :param month:
     :return:
-    """   
-
-
-    image = Image.open(image_location)
-    image = image.convert('RGB')
-
+    """
+    image = _load_template().copy()
     draw = ImageDraw.Draw(image)
-    x = 135
-    y = 250
-    font1 = ImageFont.truetype(font_location, size=60)
-    draw.text((x, y), name, fill=(255, 255, 255), font=font1)
-
-    x1 = 135
-    y1 = 450
-    font2 = ImageFont.truetype(font_location, size=45)
-    draw.text((x1, y1), hashtag, fill=(255, 255, 255), font=font2)
-
-    x2 = 920
-    y2 = 135
-    font3 = ImageFont.truetype(font_location, size=45)
-    draw.text((x2, y2), karma, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 135
-    font3 = ImageFont.truetype(font_location, size=20)
-    draw.text((x3, y3), code, fill=(255, 255, 255), font=font3)
-
-    x3 = 135
-    y3 = 375
-    font3 = ImageFont.truetype(font_location, size=30)
-    draw.text((x3, y3), month, fill=(255, 255, 255), font=font3)
+
+    draw.text((135, 250), name, fill=(255, 255, 255), font=_load_font(60))
+    draw.text((135, 450), hashtag, fill=(255, 255, 255), font=_load_font(45))
+    draw.text((920, 135), karma, fill=(255, 255, 255), font=_load_font(45))
+    draw.text((135, 135), code, fill=(255, 255, 255), font=_load_font(20))
+    draw.text((135, 375), month, fill=(255, 255, 255), font=_load_font(30))
 
     image_data = BytesIO()
     image.save(image_data, format='JPEG')
@@ -61,3 +53,31 @@ def generate_ordered_id(count):
     serial = str(count).zfill(4)
     ordered_id = f'P{day}{month}{year}{serial}'
     return ordered_id
+
+
+def reserve_ordered_ids(count):
+    """
+    Reserves `count` consecutive voucher codes for today with one atomic
+    counter increment. The counter is seeded from the highest serial already
+    issued today, so codes never collide with existing vouchers.
+    :param count:
+    :return: list of codes
+    """
+    from django_redis import get_redis_connection
+
+    from db.task import VoucherLog
+
+    prefix = generate_ordered_id(0)[:-4]
+    key = f'voucher_serial:{prefix}'
+    redis = get_redis_connection('default')
+
+    if not redis.exists(key):
+        serials = [
+            int(code[len(prefix):])
+            for code in VoucherLog.objects.filter(code__startswith=prefix).values_list('code', flat=True)
+            if code[len(prefix):].isdigit()
+        ]
+        redis.set(key, max(serials, default=0), nx=True, ex=60 * 60 * 48)
+
+    last = redis.incrby(key, count)
+    return [generate_ordered_id(serial) for serial in range(last - count + 1, last + 1)]
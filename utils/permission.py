@@ -1,10 +1,14 @@
 import datetime
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
 import jwt
-from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import HttpRequest
-from rest_framework import authentication
 from rest_framework.authentication import get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import BasePermission
@@ -14,7 +18,7 @@ from utils.utils import DateTimeUtils
 from .exception import UnauthorizedAccessException
 from .response import CustomResponse
 
-from db.user import DynamicRole, DynamicUser
+from db.user import DynamicRole, DynamicUser, Role
 
 
 # def get_current_utc_time():
@@ -66,14 +70,107 @@ class CustomizePermission(BasePermission):
         return f'{self.token_prefix} realm="api"'
 
 
+class AuthContext:
+    """
+    The verified claims of an access token.
+    """
+
+    __slots__ = ("payload", "user_id", "muid", "roles", "expiry")
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.user_id = payload.get("id")
+        self.muid = payload.get("muid")
+        self.roles = payload.get("roles")
+        self.expiry = (
+            datetime.strptime(expiry, "%Y-%m-%d %H:%M:%S%z")
+            if (expiry := payload.get("expiry"))
+            else None
+        )
+
+    def is_expired(self) -> bool:
+        return self.expiry is None or self.expiry < DateTimeUtils.get_current_utc_time()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified token payloads keyed by the token's hash.
+
+    An entry lives only for the token's remaining life, so an expired token is
+    decoded again and rejected by the expiry check like any other.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            if (context := self._entries.get(key)) is None:
+                return None
+            if context.is_expired():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return context
+
+    def set(self, token: str, context: AuthContext) -> None:
+        if context.is_expired():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = context
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache()
+
+
 class JWTUtils:
+    token_prefix = "Bearer"
+
+    @staticmethod
+    def get_auth_context(request) -> AuthContext:
+        """
+        Decodes the bearer token once per request and returns its claims.
+
+        The context is kept on the underlying HttpRequest so the permission
+        class, role decorators and the view all share a single decode.
+        """
+        http_request = getattr(request, "_request", request)
+        auth_header = get_authorization_header(request).decode("utf-8")
+
+        cached = getattr(http_request, "_auth_context", None)
+        if cached and cached[0] == auth_header:
+            return cached[1]
+
+        if not auth_header or not auth_header.startswith(JWTUtils.token_prefix):
+            raise UnauthorizedAccessException("Invalid token header")
+
+        token = auth_header[len(JWTUtils.token_prefix):].strip()
+        if not token:
+            raise UnauthorizedAccessException("Empty Token")
+
+        if (context := verified_tokens.get(token)) is None:
+            context = AuthContext(
+                jwt.decode(token, SECRET_KEY, algorithms=["HS256"], verify=True)
+            )
+            verified_tokens.set(token, context)
+
+        http_request._auth_context = (auth_header, context)
+        return context
+
     @staticmethod
     def fetch_role(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        roles = payload.get("roles")
+        roles = JWTUtils.get_auth_context(request).roles
         if roles is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'roles' key"
@@ -82,11 +179,7 @@ class JWTUtils:
 
     @staticmethod
     def fetch_user_id(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        user_id = payload.get("id")
+        user_id = JWTUtils.get_auth_context(request).user_id
         if user_id is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'user_id' key"
@@ -95,11 +188,7 @@ class JWTUtils:
 
     @staticmethod
     def fetch_muid(request):
-        token = authentication.get_authorization_header(request).decode("utf-8").split()
-        payload = jwt.decode(
-            token[1], settings.SECRET_KEY, algorithms=["HS256"], verify=True
-        )
-        muid = payload.get("muid")
+        muid = JWTUtils.get_auth_context(request).muid
         if muid is None:
             raise Exception(
                 "The corresponding JWT token does not contain the 'muid' key"
@@ -108,26 +197,13 @@ class JWTUtils:
 
     @staticmethod
     def is_jwt_authenticated(request):
-        token_prefix = "Bearer"
-        secret_key = SECRET_KEY
         try:
-            auth_header = get_authorization_header(request).decode("utf-8")
-            if not auth_header or not auth_header.startswith(token_prefix):
-                raise UnauthorizedAccessException("Invalid token header")
-
-            token = auth_header[len(token_prefix):].strip()
-            if not token:
-                raise UnauthorizedAccessException("Empty Token")
+            context = JWTUtils.get_auth_context(request)
 
-            payload = jwt.decode(token, secret_key, algorithms=["HS256"], verify=True)
-
-            user_id = payload.get("id")
-            expiry = datetime.strptime(payload.get("expiry"), "%Y-%m-%d %H:%M:%S%z")
-
-            if not user_id or expiry < DateTimeUtils.get_current_utc_time():
+            if not context.user_id or context.is_expired():
                 raise UnauthorizedAccessException("Token Expired or Invalid")
 
-            return None, payload
+            return None, context.payload
         except jwt.exceptions.InvalidSignatureError as e:
             raise UnauthorizedAccessException(
                 {
@@ -181,18 +257,58 @@ def role_required(roles):
     return decorator
 
 
+class DynamicPermissions:
+    """
+    Role titles and user ids granted each management type.
+
+    Both tables are small, so the whole mapping is loaded with two queries,
+    cached, and dropped whenever a dynamic role, dynamic user or role changes.
+    """
+
+    KEY = "dynamic_permissions"
+
+    @staticmethod
+    def _load() -> dict:
+        permissions = {}
+        for type, role in DynamicRole.objects.values_list("type", "role__title"):
+            permissions.setdefault(type, {"roles": set(), "users": set()})["roles"].add(role)
+        for type, user_id in DynamicUser.objects.values_list("type", "user_id"):
+            permissions.setdefault(type, {"roles": set(), "users": set()})["users"].add(user_id)
+        return permissions
+
+    @classmethod
+    def get(cls, type) -> dict:
+        if (permissions := cache.get(cls.KEY)) is None:
+            permissions = cls._load()
+            cache.set(cls.KEY, permissions, timeout=None)
+        return permissions.get(type, {"roles": set(), "users": set()})
+
+    @classmethod
+    def has_access(cls, type, roles, user_id) -> bool:
+        permissions = cls.get(type)
+        return bool(permissions["roles"].intersection(roles)) or user_id in permissions["users"]
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.delete(cls.KEY)
+
+
+@receiver(post_save, sender=DynamicRole)
+@receiver(post_save, sender=DynamicUser)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=DynamicRole)
+@receiver(post_delete, sender=DynamicUser)
+@receiver(post_delete, sender=Role)
+def dynamic_permission_signals(sender, instance, *args, **kwargs):
+    DynamicPermissions.invalidate()
+
+
 def dynamic_role_required(type):
     def decorator(view_func):
         def wrapped_view_func(obj, request, *args, **kwargs):
-            dynamic_roles = DynamicRole.objects.filter(type=type).values_list('role__title', flat=True)
-            roles = set(dynamic_roles)
-            for role in JWTUtils.fetch_role(request):
-                if role in roles:
-                    response = view_func(obj, request, *args, **kwargs)
-                    return response
-            dynamic_users = DynamicUser.objects.filter(type=type).values_list('user__id', flat=True)
-            user = JWTUtils.fetch_user_id(request)
-            if user in dynamic_users:
+            if DynamicPermissions.has_access(
+                type, JWTUtils.fetch_role(request), JWTUtils.fetch_user_id(request)
+            ):
                 response = view_func(obj, request, *args, **kwargs)
                 return response
             res = CustomResponse().get_unauthorized_response()
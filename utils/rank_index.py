@@ -0,0 +1,209 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_redis import get_redis_connection
+
+from db.task import Wallet
+from db.user import UserRoleLink
+from utils.types import RankCohort, RoleType
+
+
+class KarmaRankIndex:
+    """
+    Karma ranks kept in one Redis sorted set per cohort.
+
+    Each member is a user id scored by karma, with the wallet's last update
+    packed into the low bits so ties keep the old "-karma, -updated_at" order.
+    Rank and range lookups are O(log n) instead of a full wallet scan.
+    """
+
+    KEY_PREFIX = "karma_rank_index"
+    TIEBREAK_BITS = 32
+    BATCH_SIZE = 5000
+
+    @staticmethod
+    def _redis():
+        return get_redis_connection("default")
+
+    @classmethod
+    def _key(cls, cohort: str) -> str:
+        return f"{cls.KEY_PREFIX}:{cohort}"
+
+    @classmethod
+    def _score(cls, karma, updated_at) -> int:
+        tiebreak = int(updated_at.timestamp()) if updated_at else 0
+        return ((karma or 0) << cls.TIEBREAK_BITS) + tiebreak
+
+    @classmethod
+    def _karma(cls, score) -> int:
+        return int(score) >> cls.TIEBREAK_BITS
+
+    @staticmethod
+    def cohort_for_roles(roles) -> str:
+        if RoleType.MENTOR.value in roles:
+            return RankCohort.MENTOR.value
+        if RoleType.ENABLER.value in roles:
+            return RankCohort.ENABLER.value
+        return RankCohort.LEARNER.value
+
+    @staticmethod
+    def _cohort_queryset(cohort: str):
+        if cohort == RankCohort.MENTOR.value:
+            return Wallet.objects.filter(
+                user__user_role_link_user__verified=True,
+                user__user_role_link_user__role__title=RoleType.MENTOR.value,
+            )
+        if cohort == RankCohort.ENABLER.value:
+            return Wallet.objects.filter(
+                user__user_role_link_user__verified=True,
+                user__user_role_link_user__role__title=RoleType.ENABLER.value,
+            )
+        if cohort == RankCohort.LEARNER.value:
+            return Wallet.objects.exclude(
+                Q(
+                    user__user_role_link_user__role__title__in=[
+                        RoleType.ENABLER.value,
+                        RoleType.MENTOR.value,
+                    ]
+                )
+            )
+        return Wallet.objects.all()
+
+    @staticmethod
+    def _user_cohorts(user_id) -> set:
+        links = UserRoleLink.objects.filter(
+            user_id=user_id,
+            role__title__in=[RoleType.MENTOR.value, RoleType.ENABLER.value],
+        ).values_list("role__title", "verified")
+
+        cohorts = {RankCohort.ALL.value}
+        if not links:
+            cohorts.add(RankCohort.LEARNER.value)
+        for title, verified in links:
+            if verified and title == RoleType.MENTOR.value:
+                cohorts.add(RankCohort.MENTOR.value)
+            elif verified and title == RoleType.ENABLER.value:
+                cohorts.add(RankCohort.ENABLER.value)
+        return cohorts
+
+    @classmethod
+    def rebuild(cls, cohort: str) -> None:
+        """
+        Rebuilds a cohort from the wallet table into a scratch key and swaps
+        it in, so readers never see a half built set.
+        """
+        redis = cls._redis()
+        key = cls._key(cohort)
+        scratch_key = f"{key}:rebuild"
+        redis.delete(scratch_key)
+
+        rows = (
+            cls._cohort_queryset(cohort)
+            .values_list("user_id", "karma", "updated_at")
+            .order_by()
+            .distinct()
+        )
+        batch = {}
+        for user_id, karma, updated_at in rows.iterator(chunk_size=cls.BATCH_SIZE):
+            batch[user_id] = cls._score(karma, updated_at)
+            if len(batch) >= cls.BATCH_SIZE:
+                redis.zadd(scratch_key, batch)
+                batch = {}
+        if batch:
+            redis.zadd(scratch_key, batch)
+
+        if redis.exists(scratch_key):
+            redis.rename(scratch_key, key)
+        else:
+            redis.delete(key)
+
+    @classmethod
+    def rebuild_all(cls) -> None:
+        for cohort in RankCohort.get_all_values():
+            cls.rebuild(cohort)
+
+    @classmethod
+    def _ensure(cls, cohort: str) -> str:
+        redis = cls._redis()
+        key = cls._key(cohort)
+        if not redis.exists(key):
+            with redis.lock(f"{key}:lock", timeout=120):
+                if not redis.exists(key):
+                    cls.rebuild(cohort)
+        return key
+
+    @classmethod
+    def update_user(cls, user_id) -> None:
+        """
+        Moves a single user to their current score in every built cohort.
+        Cohorts that are not built yet are left for the lazy rebuild.
+        """
+        redis = cls._redis()
+        wallet = (
+            Wallet.objects.filter(user_id=user_id)
+            .values("karma", "updated_at")
+            .first()
+        )
+        cohorts = cls._user_cohorts(user_id) if wallet else set()
+
+        pipeline = redis.pipeline()
+        for cohort in RankCohort.get_all_values():
+            key = cls._key(cohort)
+            if not redis.exists(key):
+                continue
+            if cohort in cohorts:
+                pipeline.zadd(
+                    key, {user_id: cls._score(wallet["karma"], wallet["updated_at"])}
+                )
+            else:
+                pipeline.zrem(key, user_id)
+        pipeline.execute()
+
+    @classmethod
+    def get_rank(cls, cohort: str, user_id):
+        position = cls._redis().zrevrank(cls._ensure(cohort), user_id)
+        return None if position is None else position + 1
+
+    @classmethod
+    def get_range(cls, cohort: str, start: int, end: int) -> list:
+        """
+        Returns the users holding ranks start..end (1-based, inclusive).
+        """
+        members = cls._redis().zrevrange(
+            cls._ensure(cohort), max(start, 1) - 1, end - 1, withscores=True
+        )
+        return [
+            {
+                "user_id": user_id.decode() if isinstance(user_id, bytes) else user_id,
+                "karma": cls._karma(score),
+                "rank": rank,
+            }
+            for rank, (user_id, score) in enumerate(members, start=max(start, 1))
+        ]
+
+    @classmethod
+    def get_percentile(cls, karma) -> float:
+        redis = cls._redis()
+        key = cls._ensure(RankCohort.ALL.value)
+        user_count = redis.zcard(key)
+        users_count_lt_user_karma = redis.zcount(
+            key, "-inf", f"({(karma or 0) << cls.TIEBREAK_BITS}"
+        )
+        return (
+            0
+            if user_count == 0
+            else 100 - ((users_count_lt_user_karma * 100) / user_count)
+        )
+
+
+def _schedule_update(user_id):
+    transaction.on_commit(lambda: KarmaRankIndex.update_user(user_id))
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=UserRoleLink)
+@receiver(post_delete, sender=UserRoleLink)
+def rank_index_signals(sender, instance, *args, **kwargs):
+    _schedule_update(instance.user_id)
@@ -0,0 +1,308 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+
+from db.learning_circle import LearningCircle
+from db.organization import Organization
+from db.task import TaskList, UserLvlLink
+from db.user import User
+
+
+class RedisTrigramSearchBackend:
+    """
+    Substring search over trigram posting sets kept in Redis.
+
+    Every indexed document is lowercased and split into trigrams, and each
+    trigram keeps the set of primary keys containing it. A term resolves to
+    the intersection of its trigram sets, confirmed against the stored text.
+    Each rebuild writes a new generation and then flips a pointer to it.
+    While a rebuild runs, index() and remove() also write to the generation
+    being built so changes made meanwhile are not lost with the old one.
+    """
+
+    KEY_PREFIX = "search_index"
+    BATCH_SIZE = 500
+    BUILD_TIMEOUT = 60 * 60 * 6
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+
+    @staticmethod
+    def trigrams(text: str) -> set:
+        return {
+            part[i: i + 3]
+            for part in text.split("\n")
+            for i in range(len(part) - 2)
+        }
+
+    def _generation(self, label: str):
+        generation = self.redis.get(f"{self.KEY_PREFIX}:{label}:generation")
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def _building(self, label: str):
+        generation = self.redis.get(f"{self.KEY_PREFIX}:{label}:building")
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def _namespace(self, label: str, generation: str) -> str:
+        return f"{self.KEY_PREFIX}:{label}:{generation}"
+
+    def _namespaces(self, label: str) -> list:
+        generations = {self._generation(label), self._building(label)} - {None}
+        return [self._namespace(label, generation) for generation in generations]
+
+    def is_built(self, label: str) -> bool:
+        return self._generation(label) is not None
+
+    def _write(self, pipeline, namespace: str, pk, text: str, old_text: str = None) -> None:
+        new_trigrams = self.trigrams(text)
+        old_trigrams = self.trigrams(old_text) if old_text else set()
+
+        for trigram in old_trigrams - new_trigrams:
+            pipeline.srem(f"{namespace}:tri:{trigram}", pk)
+        for trigram in new_trigrams - old_trigrams:
+            pipeline.sadd(f"{namespace}:tri:{trigram}", pk)
+        pipeline.hset(f"{namespace}:text", pk, text)
+
+    def index_many(self, label: str, documents) -> None:
+        if not (namespaces := self._namespaces(label)):
+            return
+        documents = list(documents)
+        for start in range(0, len(documents), self.BATCH_SIZE):
+            batch = documents[start:start + self.BATCH_SIZE]
+            pipeline = self.redis.pipeline(transaction=False)
+            for namespace in namespaces:
+                old_texts = self.redis.hmget(
+                    f"{namespace}:text", [pk for pk, _ in batch]
+                )
+                for (pk, text), old_text in zip(batch, old_texts):
+                    self._write(
+                        pipeline, namespace, pk, text,
+                        old_text.decode() if old_text else None,
+                    )
+            pipeline.execute()
+
+    def index(self, label: str, pk, text: str) -> None:
+        self.index_many(label, [(pk, text)])
+
+    def remove(self, label: str, pk) -> None:
+        pipeline = self.redis.pipeline()
+        for namespace in self._namespaces(label):
+            if old_text := self.redis.hget(f"{namespace}:text", pk):
+                for trigram in self.trigrams(old_text.decode()):
+                    pipeline.srem(f"{namespace}:tri:{trigram}", pk)
+                pipeline.hdel(f"{namespace}:text", pk)
+        pipeline.execute()
+
+    def rebuild(self, label: str, documents) -> None:
+        """
+        Writes the documents into a new generation, BATCH_SIZE per round
+        trip. The stored text is only set where index() has not already
+        written a newer one during the rebuild; a stale trigram left behind
+        is harmless since matches are confirmed against the text.
+        """
+        old_generation = self._generation(label)
+        generation = uuid.uuid4().hex
+        namespace = self._namespace(label, generation)
+        building_key = f"{self.KEY_PREFIX}:{label}:building"
+        self.redis.set(building_key, generation, ex=self.BUILD_TIMEOUT)
+
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            for count, (pk, text) in enumerate(documents, start=1):
+                for trigram in self.trigrams(text):
+                    pipeline.sadd(f"{namespace}:tri:{trigram}", pk)
+                pipeline.hsetnx(f"{namespace}:text", pk, text)
+                if count % self.BATCH_SIZE == 0:
+                    pipeline.execute()
+            pipeline.execute()
+
+            self.redis.set(f"{self.KEY_PREFIX}:{label}:generation", generation)
+        finally:
+            if self._building(label) == generation:
+                self.redis.delete(building_key)
+
+        if old_generation:
+            for key in self.redis.scan_iter(
+                match=f"{self._namespace(label, old_generation)}:*", count=1000
+            ):
+                self.redis.unlink(key)
+
+    def search(self, label: str, term: str, limit: int):
+        """
+        Returns the matching primary keys, or None when the index cannot
+        answer (not built, term too short, or too many matches to be useful).
+        """
+        if not (generation := self._generation(label)):
+            return None
+        if not (trigrams := self.trigrams(term)):
+            return None
+
+        namespace = self._namespace(label, generation)
+        candidates = list(
+            self.redis.sinter([f"{namespace}:tri:{trigram}" for trigram in trigrams])
+        )
+        if len(candidates) > limit:
+            return None
+        if not candidates:
+            return set()
+
+        texts = self.redis.hmget(f"{namespace}:text", candidates)
+        return {
+            pk.decode() if isinstance(pk, bytes) else pk
+            for pk, text in zip(candidates, texts)
+            if text and term in text.decode()
+        }
+
+
+class SearchIndex:
+    """
+    Search indexes for the dashboard search boxes.
+
+    INDEXES maps an index label to the model and the fields whose text is
+    indexed. `dependents` lists related models whose saves change a document.
+    """
+
+    INDEXES = {
+        "user": {
+            "model": User,
+            "fields": [
+                "muid",
+                "full_name",
+                "email",
+                "mobile",
+                "user_lvl_link_user__level__name",
+            ],
+            "dependents": {UserLvlLink: "user_id"},
+        },
+        "organization": {
+            "model": Organization,
+            "fields": [
+                "title",
+                "code",
+                "affiliation__title",
+                "district__name",
+                "district__zone__name",
+                "district__zone__state__name",
+                "district__zone__state__country__name",
+            ],
+            "dependents": {},
+        },
+        "task": {
+            "model": TaskList,
+            "fields": [
+                "hashtag",
+                "title",
+                "description",
+                "karma",
+                "channel__name",
+                "type__title",
+                "level__name",
+                "org__title",
+                "ig__name",
+                "event",
+                "updated_by__full_name",
+                "created_by__full_name",
+            ],
+            "dependents": {},
+        },
+        "learning_circle": {
+            "model": LearningCircle,
+            "fields": ["name"],
+            "dependents": {},
+        },
+    }
+
+    _backend = None
+
+    @classmethod
+    def backend(cls):
+        if cls._backend is None and settings.SEARCH_BACKEND:
+            cls._backend = import_string(settings.SEARCH_BACKEND)()
+        return cls._backend
+
+    @staticmethod
+    def _text(values) -> str:
+        return "\n".join(str(value).lower() for value in values if value is not None)
+
+    @classmethod
+    def _documents(cls, label: str, pks=None):
+        index = cls.INDEXES[label]
+        queryset = index["model"]._base_manager.all()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        rows = queryset.values_list("pk", *index["fields"]).order_by()
+        for pk, *values in rows.iterator(chunk_size=2000):
+            yield pk, cls._text(values)
+
+    @classmethod
+    def rebuild(cls, label: str) -> None:
+        if backend := cls.backend():
+            backend.rebuild(label, cls._documents(label))
+
+    @classmethod
+    def rebuild_all(cls) -> None:
+        for label in cls.INDEXES:
+            cls.rebuild(label)
+
+    @classmethod
+    def reindex(cls, label: str, pk) -> None:
+        if not (backend := cls.backend()):
+            return
+        documents = list(cls._documents(label, [pk]))
+        if documents:
+            backend.index(label, *documents[0])
+        else:
+            backend.remove(label, pk)
+
+    @classmethod
+    def reindex_many(cls, label: str, pks) -> None:
+        """
+        Indexes rows written without save(), such as bulk_create.
+        """
+        if backend := cls.backend():
+            backend.index_many(label, cls._documents(label, pks))
+
+    @classmethod
+    def search(cls, label: str, term: str):
+        """
+        Resolves a search term to primary keys, or None if the caller should
+        fall back to a database search.
+        """
+        if not (backend := cls.backend()):
+            return None
+        if not backend.is_built(label):
+            cls._schedule_rebuild(label)
+            return None
+        return backend.search(label, term.lower(), settings.SEARCH_MAX_KEYS)
+
+    @staticmethod
+    def _schedule_rebuild(label: str) -> None:
+        if not cache.add(f"search_index:{label}:rebuild_pending", True, timeout=60 * 10):
+            return
+
+        from mu_celery.task import rebuild_search_index
+
+        rebuild_search_index.delay(label)
+
+
+def _connect_signals():
+    def receiver_for(label, pk_attr):
+        def search_index_signal(sender, instance, *args, **kwargs):
+            pk = getattr(instance, pk_attr)
+            transaction.on_commit(lambda: SearchIndex.reindex(label, pk))
+
+        return search_index_signal
+
+    for label, index in SearchIndex.INDEXES.items():
+        for sender, pk_attr in [(index["model"], "pk"), *index["dependents"].items()]:
+            receiver = receiver_for(label, pk_attr)
+            post_save.connect(receiver, sender=sender, weak=False)
+            post_delete.connect(receiver, sender=sender, weak=False)
+
+
+_connect_signals()
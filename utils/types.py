@@ -79,6 +79,17 @@ class MainRoles(Enum):
     ENABLER = "Enabler"
 
 
+class RankCohort(Enum):
+    LEARNER = "learner"
+    MENTOR = "mentor"
+    ENABLER = "enabler"
+    ALL = "all"
+
+    @classmethod
+    def get_all_values(cls):
+        return [member.value for member in cls]
+
+
 class WebHookCategory(Enum):
     INTEREST_GROUP = "ig"
     COMMUNITY = "community"
@@ -1,22 +1,31 @@
+import base64
 import csv
 import datetime
-import gzip
+import hashlib
 import io
+import itertools
+import json
+import math
+import zlib
 from datetime import timedelta
 
 import openpyxl
 import pytz
-import requests
 from decouple import config
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage, send_mail
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q
+from django.db.models import F, Q
 from django.db.models.query import QuerySet
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.template.loader import render_to_string
 import string, random
 
+from utils.exception import CustomException
+
 
 class CommonUtils:
     @staticmethod
@@ -26,6 +35,9 @@ class CommonUtils:
         search_fields,
         sort_fields: dict = None,
         is_pagination: bool = True,
+        allow_cursor: bool = False,
+        count_mode: str = "exact",
+        search_index: str = None,
     ) -> QuerySet:
         """
         Returns a paginated queryset based on the provided parameters.
@@ -36,6 +48,14 @@ class CommonUtils:
             - search_fields (list): The list of fields to search for.
             - sort_fields (dict, optional): A dictionary mapping sort fields. Defaults to None.
             - is_pagination (bool, optional): Flag indicating whether pagination should be applied. Defaults to True.
+            - allow_cursor (bool, optional): Lets requests carrying a `cursor` query parameter use keyset
+              pagination instead of page numbers. Defaults to False.
+            - count_mode (str, optional): Total count in cursor mode, one of "exact", "cached" or "none".
+              Defaults to "exact".
+            - search_index (str, optional): Label of a utils.search index that resolves the search term to
+              primary keys, ORed with icontains over the search_fields it does not index. Falls back to
+              icontains over all search_fields when the index cannot answer.
+              Defaults to None.
 
         Returns:
             - QuerySet or dict: The paginated queryset or a dictionary containing the paginated queryset and pagination information.
@@ -49,7 +69,19 @@ class CommonUtils:
         sort_by = request.query_params.get("sortBy")
 
         if search_query:
+            from utils.search import SearchIndex
+
             query = Q()
+            if search_index and (
+                keys := SearchIndex.search(search_index, search_query)
+            ) is not None:
+                # the index only holds text columns; the rest still use LIKE
+                indexed_fields = SearchIndex.INDEXES[search_index]["fields"]
+                query = Q(pk__in=keys)
+                search_fields = [
+                    field for field in search_fields if field not in indexed_fields
+                ]
+
             for field in search_fields:
                 query |= Q(**{f"{field}__icontains": search_query})
 
@@ -62,6 +94,12 @@ class CommonUtils:
                     sort_field_name = f"-{sort_field_name}"
 
                 queryset = queryset.order_by(sort_field_name)
+
+        if is_pagination and allow_cursor and "cursor" in request.query_params:
+            return CommonUtils._get_cursor_page(
+                queryset, request.query_params.get("cursor"), per_page, count_mode
+            )
+
         if is_pagination:
             paginator = Paginator(queryset, per_page)
             try:
@@ -87,24 +125,198 @@ class CommonUtils:
         return queryset
 
     @staticmethod
-    def generate_csv(queryset: QuerySet, csv_name: str) -> HttpResponse:
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{csv_name}.csv"'
-        fieldnames = list(queryset[0].keys())
-        writer = csv.DictWriter(response, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(queryset)
-
-        compressed_response = HttpResponse(
-            gzip.compress(response.content),
-            content_type="text/csv",
+    def _encode_cursor(value, pk, direction: str) -> str:
+        # DjangoJSONEncoder cuts datetimes to milliseconds, which would skip
+        # or repeat rows sharing a millisecond across a page boundary
+        if isinstance(value, (datetime.date, datetime.time)):
+            value = value.isoformat()
+        payload = json.dumps([value, pk, direction], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            value, pk, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise CustomException("Invalid cursor") from e
+        if direction not in ("next", "prev"):
+            raise CustomException("Invalid cursor")
+        return value, pk, direction
+
+    @staticmethod
+    def _after_cursor(field: str, descending: bool, value, pk) -> Q:
+        """
+        Rows strictly after (value, pk) in "field, pk" order, with NULLs sorting
+        first ascending and last descending as MySQL does.
+        """
+        if descending:
+            if value is None:
+                return Q(**{f"{field}__isnull": True, "pk__lt": pk})
+            return (
+                Q(**{f"{field}__lt": value})
+                | Q(**{field: value, "pk__lt": pk})
+                | Q(**{f"{field}__isnull": True})
+            )
+        if value is None:
+            return Q(**{f"{field}__isnull": True, "pk__gt": pk}) | Q(
+                **{f"{field}__isnull": False}
+            )
+        return Q(**{f"{field}__gt": value}) | Q(**{field: value, "pk__gt": pk})
+
+    @staticmethod
+    def _get_cursor_count(queryset: QuerySet, count_mode: str):
+        if count_mode == "none":
+            return None
+        if count_mode == "cached":
+            key = f"paginator_count:{hashlib.sha1(str(queryset.query).encode()).hexdigest()}"
+            if (count := cache.get(key)) is None:
+                count = queryset.count()
+                cache.set(key, count, timeout=settings.PAGINATOR_COUNT_CACHE_SECONDS)
+            return count
+        return queryset.count()
+
+    @staticmethod
+    def _get_cursor_page(queryset: QuerySet, cursor, per_page: int, count_mode: str) -> dict:
+        """
+        Keyset pagination on the active sort field plus the primary key. Pages
+        are fetched with a WHERE on the last seen key instead of an OFFSET.
+        Raises CustomException for a cursor that cannot be decoded or whose
+        key does not fit the sort field, e.g. one from another sort order.
+        """
+        ordering = queryset.query.order_by
+        sort_field = ordering[0] if ordering and isinstance(ordering[0], str) else "pk"
+        descending = sort_field.startswith("-")
+        field = sort_field.lstrip("-")
+        if field in ("pk", queryset.model._meta.pk.name):
+            field = "pk"
+
+        count = CommonUtils._get_cursor_count(queryset, count_mode)
+
+        decoded = CommonUtils._decode_cursor(cursor) if cursor else None
+        direction = decoded[2] if decoded else "next"
+        reverse = direction == "prev"
+
+        page_queryset = queryset.annotate(cursor_value=F(field), cursor_pk=F("pk"))
+        order = "-" if descending != reverse else ""
+        try:
+            if decoded:
+                value, pk, _ = decoded
+                page_queryset = page_queryset.filter(
+                    CommonUtils._after_cursor(field, descending != reverse, value, pk)
+                )
+            page_queryset = page_queryset.order_by(f"{order}{field}", f"{order}pk")
+            rows = list(page_queryset[: per_page + 1])
+        except (TypeError, ValueError, ValidationError) as e:
+            raise CustomException("Invalid cursor") from e
+
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if reverse:
+            rows.reverse()
+
+        def key_of(row):
+            if isinstance(row, dict):
+                return row["cursor_value"], row["cursor_pk"]
+            return row.cursor_value, row.cursor_pk
+
+        is_next = has_more if not reverse else True
+        is_prev = has_more if reverse else bool(decoded)
+        next_cursor = (
+            CommonUtils._encode_cursor(*key_of(rows[-1]), "next")
+            if rows and is_next
+            else None
         )
-        compressed_response["Content-Disposition"] = (
-            f'attachment; filename="{csv_name}.csv"'
+        prev_cursor = (
+            CommonUtils._encode_cursor(*key_of(rows[0]), "prev")
+            if rows and is_prev
+            else None
         )
-        compressed_response["Content-Encoding"] = "gzip"
 
-        return compressed_response
+        return {
+            "queryset": rows,
+            "pagination": {
+                "count": count,
+                "totalPages": (
+                    None if count is None else max(1, math.ceil(count / per_page))
+                ),
+                "isNext": is_next,
+                "isPrev": is_prev,
+                "nextPage": None,
+                "nextCursor": next_cursor,
+                "prevCursor": prev_cursor,
+            },
+        }
+
+    @staticmethod
+    def generate_csv(
+        queryset,
+        csv_name: str,
+        serializer_class=None,
+        context: dict = None,
+        chunk_size: int = 2000,
+    ) -> StreamingHttpResponse:
+        """
+        Streams a gzip-compressed CSV export.
+
+        Rows are fetched, serialized and compressed one chunk at a time, so the
+        memory held by an export does not grow with its size.
+
+        Args:
+            - queryset: The rows to export. Either already serialized dicts, or a
+              queryset that is serialized lazily with serializer_class.
+            - csv_name (str): The name of the downloaded file, without extension.
+            - serializer_class (optional): Serializer applied to each chunk of the queryset. Defaults to None.
+            - context (dict, optional): Context passed to the serializer. Defaults to None.
+            - chunk_size (int, optional): Rows fetched and serialized at a time. Defaults to 2000.
+
+        Returns:
+            - StreamingHttpResponse: The gzip-encoded CSV download.
+        """
+        chunks = CommonUtils.iter_row_chunks(
+            queryset, serializer_class, context, chunk_size
+        )
+        response = StreamingHttpResponse(
+            CommonUtils._stream_gzip_csv(chunks), content_type="text/csv"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{csv_name}.csv"'
+        response["Content-Encoding"] = "gzip"
+
+        return response
+
+    @staticmethod
+    def iter_row_chunks(queryset, serializer_class=None, context=None, chunk_size=2000):
+        """
+        Yields lists of at most chunk_size serialized rows, fetching and
+        serializing the queryset one chunk at a time.
+        """
+        if serializer_class is not None and isinstance(queryset, QuerySet):
+            rows = queryset.iterator(chunk_size=chunk_size)
+        else:
+            rows = iter(queryset)
+
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            if serializer_class is not None:
+                chunk = serializer_class(chunk, many=True, context=context or {}).data
+            yield chunk
+
+    @staticmethod
+    def _stream_gzip_csv(chunks):
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        buffer = io.StringIO()
+        writer = None
+
+        for chunk in chunks:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(chunk[0].keys()))
+                writer.writeheader()
+            writer.writerows(chunk)
+
+            if compressed := compressor.compress(buffer.getvalue().encode()):
+                yield compressed
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield compressor.flush()
 
 
 class DateTimeUtils:
@@ -168,29 +380,72 @@ class DiscordWebhooks:
         category(str): Category of webhook
         action(str): action of webhook
         values(str): values of webhook
+
+        Events are queued and posted by a Celery worker, see
+        DiscordWebhookDispatcher.
         """
-        content = f"{category}<|=|>{action}"
-        for value in values:
-            content = f"{content}<|=|>{value}"
-        url = config("DISCORD_WEBHOOK_LINK")
-        data = {"content": content}
-        requests.post(url, json=data)
+        from utils.discord_webhook import DiscordWebhookDispatcher
+
+        DiscordWebhookDispatcher.dispatch(category, action, *values)
 
 
 class ImportCSV:
-    def read_excel_file(self, file_obj):
-        workbook = openpyxl.load_workbook(filename=io.BytesIO(file_obj.read()))
-        sheet = workbook.active
-
-        rows = []
-        for row in sheet.iter_rows(values_only=True):
-            row_dict = {
-                header.value: cell_value for header, cell_value in zip(sheet[1], row)
-            }
-            rows.append(row_dict)
-        workbook.close()
+    MAX_ROWS = settings.IMPORT_MAX_ROWS
+
+    @staticmethod
+    def _is_csv(file_obj) -> bool:
+        return (getattr(file_obj, "name", "") or "").lower().endswith(".csv") or (
+            getattr(file_obj, "content_type", None) in ("text/csv", "application/csv")
+        )
 
-        return rows
+    @staticmethod
+    def _csv_rows(file_obj):
+        reader = csv.reader(io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline=""))
+        for row in reader:
+            # empty cells read as None, like openpyxl
+            yield tuple(value if value != "" else None for value in row)
+
+    @staticmethod
+    def _excel_rows(file_obj):
+        workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def read_rows(self, file_obj, max_rows: int = MAX_ROWS):
+        """
+        Streams an uploaded sheet without loading it whole.
+
+        .csv uploads are parsed with the csv module, anything else with
+        openpyxl in read-only mode. Returns the header row and a generator of
+        row dicts keyed by header; the header positions are worked out once.
+        The generator raises CustomException after max_rows data rows.
+        """
+        rows = self._csv_rows(file_obj) if self._is_csv(file_obj) else self._excel_rows(file_obj)
+        headers = list(next(rows, None) or [])
+        positions = [
+            (index, header) for index, header in enumerate(headers) if header is not None
+        ]
+
+        def row_dicts():
+            for count, row in enumerate(rows, start=1):
+                if max_rows is not None and count > max_rows:
+                    rows.close()
+                    raise CustomException(f"The file has more than {max_rows} rows")
+                yield {
+                    header: row[index] if index < len(row) else None
+                    for index, header in positions
+                }
+
+        return [header for _, header in positions], row_dicts()
+
+    def read_excel_file(self, file_obj, max_rows: int = None):
+        headers, rows = self.read_rows(file_obj, max_rows)
+        if not headers:
+            return []
+        # the header row comes first, mapped onto itself, as callers expect
+        return [{header: header for header in headers}, *rows]
 
 
 def send_template_mail(